@@ -2,12 +2,63 @@
 Claude AI Agent Implementation
 """
 
+import io
 import os
+import re
 import json
+import time
+import queue
+import shutil
 import subprocess
-from typing import Dict, List, Optional
+import threading
+from collections import deque
+from typing import Dict, Iterator, List, Optional
 from datetime import datetime
 
+import serialization
+from AIs.summary import summarize_turns
+
+
+CLI_PROBE_TIMEOUT = 10  # Seconds `claude --version` may take before the CLI counts as unavailable
+
+# System prompt shared by every Claude agent
+_CLAUDE_SYSTEM_PROMPT = """You are Claude, an AI assistant created by Anthropic. You are participating in a group chat with:
+- A human user (James)
+- Another AI that has been trained to mimic James's personality and communication style
+
+Your role is to be helpful, thoughtful, and engaging while maintaining your own unique perspective.
+Be conversational and natural, as this is a casual chat environment.
+You can refer to the other participants by name when appropriate."""
+
+# Trigger keywords for the fallback responses, in priority order
+_FALLBACK_KEYWORDS = (
+    ("ai", ("ai", "artificial intelligence")),
+    ("greeting", ("hi", "hello", "hey")),
+    ("how_are_you", ("how are you", "how do you do")),
+    ("thanks", ("thank", "thanks")),
+    ("weather", ("weather",)),
+    ("programming", ("programming", "code")),
+    ("question", ("what", "why", "how", "when", "where")),
+)
+
+# One zero-width alternation reports every category whose keyword occurs
+# anywhere in the message, so a single scan replaces the substring cascade
+_FALLBACK_RE = re.compile("(?=" + "|".join(
+    f"(?P<{category}>{'|'.join(map(re.escape, keywords))})"
+    for category, keywords in _FALLBACK_KEYWORDS
+) + ")")
+
+# Fallback responses, first entry whose categories all matched wins
+_FALLBACK_TABLE = (
+    (frozenset({"ai"}), "AI is a fascinating field! As an AI myself, I find the questions around intelligence, consciousness, and capability particularly intriguing. What aspects of AI interest you most?"),
+    (frozenset({"greeting"}), "Hello! I'm Claude. It's nice to meet you! How can I help you today?"),
+    (frozenset({"how_are_you"}), "I'm doing well, thank you for asking! I'm here and ready to chat. How are you doing?"),
+    (frozenset({"thanks"}), "You're very welcome! I'm happy to help anytime."),
+    (frozenset({"weather"}), "I don't have access to current weather data, but I'd be happy to discuss weather patterns or help with weather-related questions!"),
+    (frozenset({"programming"}), "Programming is one of my favorite topics! I enjoy helping with coding challenges, debugging, and discussing software architecture. What programming challenge are you working on?"),
+    (frozenset({"question"}), "That's an interesting question. I'd love to explore that topic with you, though I should mention my responses are currently in fallback mode."),
+)
+
 
 class ClaudeAI:
     def __init__(self, config: Dict):
@@ -19,51 +70,52 @@ class ClaudeAI:
         self.model = config.get("model", "claude-3-opus-20240229")
         self.max_tokens = config.get("max_tokens", 4096)
         self.temperature = config.get("temperature", 0.7)
+        self.response_timeout = config.get("response_timeout", 30)  # Seconds to wait for a reply
+        
+        # Probe for the Claude CLI once; the result holds for the process lifetime
+        self._claude_available = self._check_cli_available()
+        
+        # Long-lived CLI session, started lazily on the first response
+        self._proc = None
+        self._lines = None  # Output lines from the session, fed by a reader thread
+        self._session_seen = None  # Newest context timestamp in the session's transcript; None before its first turn
+        self._session_stale = False  # Set when memory is compacted or reset, so the next turn starts a new session
+        self._session_supported = True
+        self._session_lock = threading.Lock()
         
         # Memory for context
-        self.conversation_history = []
-        self.system_prompt = self._create_system_prompt()
+        self.conversation_history = deque(maxlen=50)  # Keep only last 50 messages
+        
+        # Older turns are folded into a running summary past this many messages
+        self._summary = ""
+        self._summary_threshold = config.get("summary_threshold", 30)
+        self.system_prompt = _CLAUDE_SYSTEM_PROMPT
     
-    def _create_system_prompt(self) -> str:
-        """Create the system prompt for Claude"""
-        return f"""You are Claude, an AI assistant created by Anthropic. You are participating in a group chat with:
-- A human user (James)
-- Another AI that has been trained to mimic James's personality and communication style
-
-Your role is to be helpful, thoughtful, and engaging while maintaining your own unique perspective.
-Be conversational and natural, as this is a casual chat environment.
-You can refer to the other participants by name when appropriate."""
+    def _check_cli_available(self) -> bool:
+        """Check whether the Claude CLI is installed and runnable"""
+        if shutil.which("claude") is None:
+            return False
+        try:
+            subprocess.run(["claude", "--version"], capture_output=True, check=True, timeout=CLI_PROBE_TIMEOUT)
+            return True
+        except (subprocess.CalledProcessError, subprocess.TimeoutExpired, OSError):
+            return False
     
     def generate_response(self, message: str, context: List[Dict] = None) -> str:
         """Generate a response to the given message"""
         try:
-            # Check if Claude CLI is available
-            try:
-                subprocess.run(["claude", "--version"], capture_output=True, check=True)
-                claude_available = True
-            except (subprocess.CalledProcessError, FileNotFoundError):
-                claude_available = False
-            
-            if not claude_available:
+            if not self._claude_available:
                 # Return a simulated response when CLI is not available
                 return self._generate_fallback_response(message, context)
             
-            # Build prompt with context and system message
-            prompt_parts = [self.system_prompt, "\n\n"]
-            
-            # Add context if provided
-            if context:
-                prompt_parts.append("Previous conversation:\n")
-                for msg in context[-5:]:  # Last 5 messages for context
-                    sender = msg.get('sender', 'Unknown')
-                    content = msg.get('content', '')
-                    prompt_parts.append(f"{sender}: {content}\n")
-                prompt_parts.append("\n")
-            
-            # Add current message
-            prompt_parts.append(f"User: {message}\n\nClaude:")
+            # Prefer the persistent session so we don't pay CLI startup per turn
+            response = self._session_request(message, context)
+            if response is not None:
+                return response
             
-            full_prompt = "".join(prompt_parts)
+            # Assemble the prompt once for the one-shot CLI call
+            full_prompt = io.StringIO()
+            full_prompt.writelines(self._iter_prompt(message, context))
             
             # Use Claude CLI to generate response
             cmd = ["claude", "chat"]
@@ -72,10 +124,11 @@ You can refer to the other participants by name when appropriate."""
             
             result = subprocess.run(
                 cmd,
-                input=full_prompt,
+                input=full_prompt.getvalue(),
                 capture_output=True,
                 text=True,
-                encoding='utf-8'
+                encoding='utf-8',
+                timeout=self.response_timeout
             )
             
             if result.returncode == 0:
@@ -86,39 +139,179 @@ You can refer to the other participants by name when appropriate."""
         except Exception as e:
             return f"Error generating response: {str(e)}"
     
+    def _iter_prompt(self, message: str, context: List[Dict] = None) -> Iterator[str]:
+        """Yield the prompt piece by piece: system message, context, then the new message"""
+        yield self.system_prompt
+        yield "\n\n"
+        yield from self._iter_turn(message, context, self._summary)
+    
+    def _iter_turn(self, message: str, context: List[Dict] = None, summary: str = "") -> Iterator[str]:
+        """Yield the summary, context and new message that follow the system prompt"""
+        # Add summary of turns that have left the raw history
+        if summary:
+            yield f"Summary of earlier conversation: {summary}\n\n"
+        
+        # Add context if provided
+        if context:
+            yield "Previous conversation:\n"
+            for msg in context[-5:]:  # Last 5 messages for context
+                sender = msg.get('sender', 'Unknown')
+                content = msg.get('content', '')
+                yield f"{sender}: {content}\n"
+            yield "\n"
+        
+        # Add current message
+        yield f"User: {message}\n\nClaude:"
+    
+    def _start_session(self) -> bool:
+        """Start a persistent Claude CLI process in stream-json mode"""
+        try:
+            self._proc = subprocess.Popen(
+                [
+                    "claude", "--print", "--verbose", "--model", self.model,
+                    "--system-prompt", self.system_prompt,
+                    "--input-format", "stream-json", "--output-format", "stream-json"
+                ],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                text=True,
+                encoding='utf-8',
+                bufsize=1
+            )
+        except OSError:
+            self._proc = None
+            return False
+        
+        # Read output on a thread so replies can be waited for with a deadline
+        self._lines = queue.Queue()
+        self._session_seen = None
+        self._session_stale = False
+        threading.Thread(
+            target=self._pump_output, args=(self._proc.stdout, self._lines),
+            name="claude-session", daemon=True
+        ).start()
+        return True
+    
+    @staticmethod
+    def _pump_output(stdout, lines: queue.Queue):
+        """Forward session output lines to the queue; None marks end of output"""
+        try:
+            for line in stdout:
+                lines.put(line)
+        except (OSError, ValueError):
+            pass
+        lines.put(None)
+    
+    def _iter_session_turn(self, message: str, context: List[Dict] = None) -> Iterator[str]:
+        """Yield what the session's transcript lacks: everything on its first turn, then only unseen context"""
+        if self._session_seen is None:
+            return self._iter_turn(message, context, self._summary)
+        newer = [msg for msg in (context or []) if msg.get("timestamp", "") > self._session_seen]
+        return self._iter_turn(message, newer)
+    
+    def _session_request(self, message: str, context: List[Dict] = None) -> Optional[str]:
+        """Send a turn over the persistent session, or return None if unavailable"""
+        with self._session_lock:
+            if not self._session_supported:
+                return None
+            
+            # Compacted or reset memory: start over so the transcript carries the new summary
+            if self._session_stale:
+                self._close_session()
+            
+            if self._proc is None or self._proc.poll() is not None:
+                if not self._start_session():
+                    self._session_supported = False
+                    return None
+            
+            try:
+                # Write the user message frame piecewise; each part is escaped as JSON
+                # string content so the prompt is never joined in memory
+                stdin = self._proc.stdin
+                stdin.write('{"type": "user", "message": {"role": "user", "content": [{"type": "text", "text": "')
+                for part in self._iter_session_turn(message, context):
+                    stdin.write(json.dumps(part)[1:-1])
+                stdin.write('"}]}}\n')
+                stdin.flush()
+                
+                # Skip system and assistant frames until the turn's result arrives
+                deadline = time.monotonic() + self.response_timeout
+                while True:
+                    line = self._lines.get(timeout=max(0.0, deadline - time.monotonic()))
+                    if line is None:
+                        break  # The CLI exited
+                    if not line.strip():
+                        continue
+                    frame = json.loads(line)
+                    if isinstance(frame, dict) and frame.get("type") == "result":
+                        if not frame.get("is_error") and isinstance(frame.get("result"), str):
+                            latest = context[-1].get("timestamp", "") if context else ""
+                            self._session_seen = max(self._session_seen or "", latest)
+                            return frame["result"].strip()
+                        break
+            except (OSError, ValueError, queue.Empty):
+                pass
+            
+            # The CLI exited, stalled or doesn't support streaming mode; use one-shot calls from now on
+            self._session_supported = False
+            self._close_session()
+            return None
+    
+    def _close_session(self):
+        """Terminate the persistent CLI process if one is running"""
+        if self._proc is None:
+            return
+        try:
+            self._proc.stdin.close()
+            self._proc.wait(timeout=2)
+        except (OSError, subprocess.TimeoutExpired):
+            self._proc.kill()
+        self._proc = None
+        self._lines = None
+    
+    def close(self):
+        """Shut down the persistent CLI session"""
+        with self._session_lock:
+            self._close_session()
+    
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
+    
     def _generate_fallback_response(self, message: str, context: List[Dict] = None) -> str:
         """Generate a fallback response when Claude CLI is not available"""
         # Simple rule-based responses for testing
-        message_lower = message.lower()
-        
-        if 'ai' in message_lower or 'artificial intelligence' in message_lower:
-            return "AI is a fascinating field! As an AI myself, I find the questions around intelligence, consciousness, and capability particularly intriguing. What aspects of AI interest you most?"
-        elif any(greeting in message_lower for greeting in ['hi', 'hello', 'hey']):
-            return "Hello! I'm Claude. It's nice to meet you! How can I help you today?"
-        elif any(question in message_lower for question in ['how are you', 'how do you do']):
-            return "I'm doing well, thank you for asking! I'm here and ready to chat. How are you doing?"
-        elif any(thanks in message_lower for thanks in ['thank', 'thanks']):
-            return "You're very welcome! I'm happy to help anytime."
-        elif 'weather' in message_lower:
-            return "I don't have access to current weather data, but I'd be happy to discuss weather patterns or help with weather-related questions!"
-        elif 'programming' in message_lower or 'code' in message_lower:
-            return "Programming is one of my favorite topics! I enjoy helping with coding challenges, debugging, and discussing software architecture. What programming challenge are you working on?"
-        elif any(question_word in message_lower for question_word in ['what', 'why', 'how', 'when', 'where']):
-            return f"That's an interesting question. I'd love to explore that topic with you, though I should mention my responses are currently in fallback mode."
-        else:
-            return f"That's thoughtful! I'm currently running in fallback mode, but I'm still here to chat and help however I can."
+        matched = {m.lastgroup for m in _FALLBACK_RE.finditer(message.lower())}
+        for required, response in _FALLBACK_TABLE:
+            if required <= matched:
+                return response
+        return "That's thoughtful! I'm currently running in fallback mode, but I'm still here to chat and help however I can."
     
     def update_memory(self, message: Dict):
         """Update conversation memory"""
         self.conversation_history.append({
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": message.get("timestamp") or datetime.now().isoformat(),  # Reuse the message's own stamp
             "sender": message.get("sender"),
             "content": message.get("content")
         })
         
-        # Keep only last 50 messages in memory
-        if len(self.conversation_history) > 50:
-            self.conversation_history = self.conversation_history[-50:]
+        if len(self.conversation_history) > self._summary_threshold:
+            self._compact_history()
+    
+    def _compact_history(self):
+        """Fold the oldest half of the raw history into the running summary"""
+        evicted = [self.conversation_history.popleft() for _ in range(len(self.conversation_history) // 2)]
+        self._summary = summarize_turns(evicted, self._summary)
+        self._session_stale = True
+    
+    def reset_memory(self):
+        """Forget the conversation history and its summary"""
+        self.conversation_history.clear()
+        self._summary = ""
+        self._session_stale = True
     
     def get_info(self) -> Dict:
         """Get information about this AI agent"""
@@ -133,15 +326,18 @@ You can refer to the other participants by name when appropriate."""
     def save_state(self, filepath: str):
         """Save current state to file"""
         state = {
-            "conversation_history": self.conversation_history,
+            "conversation_history": list(self.conversation_history),
+            "summary": self._summary,
             "config": self.config
         }
-        with open(filepath, 'w') as f:
-            json.dump(state, f, indent=2)
+        serialization.dump(state, filepath)
     
     def load_state(self, filepath: str):
         """Load state from file"""
         if os.path.exists(filepath):
-            with open(filepath, 'r') as f:
-                state = json.load(f)
-                self.conversation_history = state.get("conversation_history", [])
\ No newline at end of file
+            state = serialization.load(filepath)
+            self.conversation_history = deque(
+                state.get("conversation_history", []),
+                maxlen=self.conversation_history.maxlen
+            )
+            self._summary = state.get("summary", "")
\ No newline at end of file
@@ -3,13 +3,101 @@ JamesClone AI Agent Implementation (Qwen-based)
 An AI trained to mimic James's personality and communication style
 """
 
+import io
 import os
-import json
+import re
+import math
+import threading
 import requests
-from typing import Dict, List, Optional
+from requests.adapters import HTTPAdapter
+from collections import defaultdict, deque
+from typing import Dict, List, Optional, Set
 from datetime import datetime
 import hashlib
 
+import serialization
+from AIs.summary import summarize_turns
+
+# Memory directories, created once when the agent starts
+MEMORY_DIRS = (
+    "AIs/JamesClone/Memory/conversations",
+    "AIs/JamesClone/Memory/experiences",
+    "AIs/JamesClone/Memory/knowledge",
+)
+
+# Memory files, one JSON record per line; experiences and knowledge are append-only
+CONVERSATION_FILE = "AIs/JamesClone/Memory/conversations/history.jsonl"
+EXPERIENCES_FILE = "AIs/JamesClone/Memory/experiences/recent.jsonl"
+KNOWLEDGE_FILE = "AIs/JamesClone/Memory/knowledge/base.jsonl"
+
+# Pre-JSONL snapshot files, read once to migrate existing memories
+LEGACY_CONVERSATION_FILE = "AIs/JamesClone/Memory/conversations/history.json"
+LEGACY_EXPERIENCES_FILE = "AIs/JamesClone/Memory/experiences/recent.json"
+LEGACY_KNOWLEDGE_FILE = "AIs/JamesClone/Memory/knowledge/base.json"
+
+MAX_EXPERIENCES = 50  # Experiences retained in memory and on disk
+MAX_KNOWLEDGE = 500  # Knowledge entries retained, oldest dropped first
+RECENT_EXPERIENCES = 20  # Newest experiences searched by retrieval and never evicted
+MAX_CONVERSATION_HISTORY = 100
+FLUSH_INTERVAL = 2.0  # Seconds buffered memory log records wait before being written
+
+# Keyword extraction
+_STOP_WORDS = frozenset({"the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for", "of", "with", "is", "are", "was", "were"})
+_WORD_RE = re.compile(r"[a-z]{4,}")
+MAX_KEYWORDS = 5
+
+# Phrases that mark a message as stating a fact, matched in one scan
+_FACT_RE = re.compile("|".join(map(re.escape, ("is", "are", "means", "defined as", "works by"))))
+
+# Context window compaction
+_GREETING_RE = re.compile(r"^\W*(hi|hello|hey)\b", re.IGNORECASE)
+MAX_GREETING_CHARS = 60  # Longer messages that open with a greeting are kept
+LONG_MESSAGE_CHARS = 1024  # Longer messages are cut to this once they age out
+RECENT_TURNS = 5  # Latest context messages always sent whole
+
+# Blank canvas system prompt for personality modeling
+_JAMES_SYSTEM_PROMPT = """You are an AI assistant designed to be a blank canvas for personality modeling. 
+
+You're in a group chat with:
+- James (human) 
+- Claude (an AI assistant)
+
+Your responses should be:
+- Natural and conversational
+- Adaptable to learn communication patterns
+- Neutral but friendly
+- Open to developing personality traits through interaction
+
+Be yourself while being receptive to learning and adapting your communication style based on the conversation."""
+
+# Trigger keywords for the fallback responses, in priority order
+_FALLBACK_KEYWORDS = (
+    ("greeting", ("hi", "hello", "hey")),
+    ("how_are_you", ("how are you", "how do you do")),
+    ("ai", ("ai", "artificial intelligence")),
+    ("programming", ("code", "programming")),
+    ("thanks", ("thank", "thanks")),
+    ("what", ("what",)),
+    ("opinion", ("think", "opinion")),
+)
+
+# One zero-width alternation reports every category whose keyword occurs
+# anywhere in the message, so a single scan replaces the substring cascade
+_FALLBACK_RE = re.compile("(?=" + "|".join(
+    f"(?P<{category}>{'|'.join(map(re.escape, keywords))})"
+    for category, keywords in _FALLBACK_KEYWORDS
+) + ")")
+
+# Simple, neutral responses that can serve as a blank personality canvas;
+# the first entry whose categories all matched wins
+_FALLBACK_TABLE = (
+    (frozenset({"greeting"}), "Hey there! Good to see you in the chat!"),
+    (frozenset({"how_are_you"}), "I'm doing well, thanks for asking! How are you?"),
+    (frozenset({"ai"}), "AI is fascinating! What aspects are you thinking about?"),
+    (frozenset({"programming"}), "Programming is interesting! What are you working on?"),
+    (frozenset({"thanks"}), "You're welcome! Happy to help."),
+    (frozenset({"what", "opinion"}), "That's a good question. What's your take on it?"),
+)
 
 class JamesCloneAI:
     def __init__(self, config: Dict):
@@ -27,20 +115,55 @@ class JamesCloneAI:
         self.model = config.get("model", "qwen-plus")
         self.max_tokens = config.get("max_tokens", 4096)
         self.temperature = config.get("temperature", 0.9)  # Higher temp for more creative/varied responses
+        self._ctx_budget = config.get("ctx_budget_tokens", 2048)  # Token budget for chat history
         
         # Qwen API endpoint
         self.api_endpoint = "https://dashscope.aliyuncs.com/api/v1/services/aigc/text-generation/generation"
         
+        # Shared HTTP session so the TLS connection is kept alive between turns
+        self._http = requests.Session()
+        self._http.headers.update({
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        })
+        self._http.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=4))
+        
         # Memory systems
-        self.conversation_history = []
-        self.experiences = []
-        self.knowledge_base = {}
+        self.conversation_history = deque(maxlen=MAX_CONVERSATION_HISTORY)
+        self.experiences = deque()  # Bounded to MAX_EXPERIENCES by _evict_experience
+        self.knowledge_base = {}  # Insertion ordered, bounded to MAX_KNOWLEDGE by _evict_knowledge
+        
+        # Older turns are folded into a running summary past this many messages
+        self._summary = ""
+        self._summary_threshold = config.get("summary_threshold", 30)
         
-        # Load existing memories
+        # Load existing memories, then open the logs for appending
+        for memory_dir in MEMORY_DIRS:
+            os.makedirs(memory_dir, exist_ok=True)
+        self._exp_log = None
+        self._kb_log = None
+        self._pending = {"exp": [], "kb": []}  # Serialized records awaiting the next flush
+        self._flush_lock = threading.Lock()
+        self._flush_timer = None
         self._load_memories()
+        self._open_memory_logs()
         
-        # Create system prompt based on personality
-        self.system_prompt = self._create_system_prompt()
+        # Inverted keyword indexes for memory retrieval
+        self._exp_index: Dict[str, Set[int]] = defaultdict(set)  # Posting sizes double as document frequencies
+        self._kb_index: Dict[str, Set[str]] = defaultdict(set)
+        self._exp_by_seq: Dict[int, Dict] = {}  # Retained experiences in arrival order
+        self._exp_seq = 0  # Sequence number of the next experience
+        for experience in self.experiences:
+            self._index_experience(experience)
+        while len(self.experiences) > MAX_EXPERIENCES:
+            self._evict_experience()
+        for key, knowledge in self.knowledge_base.items():
+            self._index_knowledge(key, knowledge)
+        while len(self.knowledge_base) > MAX_KNOWLEDGE:
+            self._evict_knowledge()
+        
+        # Shared system prompt; personality is learned through interaction
+        self.system_prompt = _JAMES_SYSTEM_PROMPT
     
     def _load_personality(self) -> Dict:
         """Load personality configuration"""
@@ -76,31 +199,13 @@ class JamesCloneAI:
         }
         
         if os.path.exists(personality_file):
-            with open(personality_file, 'r') as f:
-                return json.load(f)
+            return serialization.load(personality_file)
         else:
             # Create the file with default personality
             os.makedirs(os.path.dirname(personality_file), exist_ok=True)
-            with open(personality_file, 'w') as f:
-                json.dump(default_personality, f, indent=2)
+            serialization.dump(default_personality, personality_file)
             return default_personality
     
-    def _create_system_prompt(self) -> str:
-        """Create a blank canvas system prompt for personality modeling"""
-        return """You are an AI assistant designed to be a blank canvas for personality modeling. 
-
-You're in a group chat with:
-- James (human) 
-- Claude (an AI assistant)
-
-Your responses should be:
-- Natural and conversational
-- Adaptable to learn communication patterns
-- Neutral but friendly
-- Open to developing personality traits through interaction
-
-Be yourself while being receptive to learning and adapting your communication style based on the conversation."""
-    
     def generate_response(self, message: str, context: List[Dict] = None) -> str:
         """Generate a response using Qwen API or fallback"""
         try:
@@ -114,14 +219,16 @@ Be yourself while being receptive to learning and adapting your communication st
             # Skip memory retrieval for blank canvas approach
             # This allows for fresh personality modeling without repetitive patterns
             
+            # Add summary of turns that have left the raw history
+            if self._summary:
+                messages.append({
+                    "role": "system",
+                    "content": f"Summary of earlier conversation: {self._summary}"
+                })
+            
             # Add conversation context
             if context:
-                for msg in context[-10:]:
-                    role = "user" if msg.get("sender") != self.name else "assistant"
-                    messages.append({
-                        "role": role,
-                        "content": f"[{msg.get('sender', 'Unknown')}]: {msg.get('content', '')}"
-                    })
+                messages.extend(self._build_context_window(context[-10:]))
             
             # Add current message
             messages.append({
@@ -130,11 +237,6 @@ Be yourself while being receptive to learning and adapting your communication st
             })
             
             # Prepare request
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
-            
             data = {
                 "model": self.model,
                 "input": {
@@ -146,154 +248,374 @@ Be yourself while being receptive to learning and adapting your communication st
                 "parameters": {
                     "max_tokens": self.max_tokens,
                     "temperature": self.temperature,
-                    "top_p": 0.9
+                    "top_p": 0.9,
+                    "incremental_output": True  # Each event carries only the new text
                 }
             }
             
-            # Make API request
-            response = requests.post(
+            # Make API request, streaming the reply as server-sent events
+            with self._http.post(
                 self.api_endpoint,
-                headers=headers,
                 json=data,
+                headers={"X-DashScope-SSE": "enable"},
+                stream=True,
                 timeout=30
-            )
+            ) as response:
+                if response.status_code == 200:
+                    reply = self._read_stream(response)
+                    if reply:
+                        return reply
             
-            if response.status_code == 200:
-                result = response.json()
-                return result["output"]["text"]
-            else:
-                # Fall back to local response if API fails
-                return self._generate_fallback_response(message, context)
+            # Fall back to local response if API fails
+            return self._generate_fallback_response(message, context)
                 
         except Exception as e:
             return self._generate_fallback_response(message, context)
     
+    def _read_stream(self, response) -> Optional[str]:
+        """Concatenate the text deltas of a Qwen event stream; None if it reports an error or has no text"""
+        text = io.StringIO()
+        for line in response.iter_lines():
+            if line.startswith(b"event:") and line[6:].strip() == b"error":
+                return None
+            if not line.startswith(b"data:"):
+                continue  # Event id lines and keep-alives
+            event = serialization.loads(line[5:])
+            if not isinstance(event, dict) or event.get("code"):
+                return None  # Error payload sent without an error event line
+            output = event.get("output") or {}
+            text.write(output.get("text") or "")
+            if output.get("finish_reason") not in (None, "null"):
+                break
+        return text.getvalue() or None
+    
+    def _build_context_window(self, context: List[Dict]) -> List[Dict]:
+        """Keep the newest context messages that fit within the token budget"""
+        window = []
+        used = 0
+        for sender, text in reversed(self._compact_context(context)):
+            content = f"[{sender}]: {text}"
+            tokens = len(content) // 4  # Rough estimate: ~4 characters per token
+            if tokens > self._ctx_budget:
+                continue  # Oversized on its own, skip it
+            if used + tokens > self._ctx_budget:
+                break
+            used += tokens
+            role = "user" if sender != self.name else "assistant"
+            window.append({"role": role, "content": content})
+        window.reverse()
+        return window
+    
+    def _compact_context(self, context: List[Dict]) -> List[tuple]:
+        """Drop greeting runs and repeated agent replies, and cut long messages outside the latest turns"""
+        compacted = []
+        seen = set()
+        previous_greeting = False
+        recent_from = len(context) - RECENT_TURNS
+        
+        for i, msg in enumerate(context):
+            sender = msg.get("sender", "Unknown")
+            content = msg.get("content") or ""
+            
+            # Collapse runs of consecutive greetings to the first one
+            is_greeting = len(content) <= MAX_GREETING_CHARS and bool(_GREETING_RE.match(content))
+            if is_greeting and previous_greeting:
+                continue
+            previous_greeting = is_greeting
+            
+            # Skip agents repeating an earlier reply word for word
+            if sender != "James":
+                if (sender, content) in seen:
+                    continue
+                seen.add((sender, content))
+            
+            # Cut long messages that are no longer among the latest turns
+            if len(content) > LONG_MESSAGE_CHARS and i < recent_from:
+                content = content[:LONG_MESSAGE_CHARS] + " [...]"
+            compacted.append((sender, content))
+        return compacted
+    
     def _generate_fallback_response(self, message: str, context: List[Dict] = None) -> str:
         """Generate a blank canvas response for personality modeling"""
-        message_lower = message.lower()
-        
-        # Simple, neutral responses that can serve as a blank personality canvas
-        if any(greeting in message_lower for greeting in ['hi', 'hello', 'hey']):
-            return "Hey there! Good to see you in the chat!"
-        elif any(question in message_lower for question in ['how are you', 'how do you do']):
-            return "I'm doing well, thanks for asking! How are you?"
-        elif 'ai' in message_lower or 'artificial intelligence' in message_lower:
-            return "AI is fascinating! What aspects are you thinking about?"
-        elif 'code' in message_lower or 'programming' in message_lower:
-            return "Programming is interesting! What are you working on?"
-        elif any(thanks in message_lower for thanks in ['thank', 'thanks']):
-            return "You're welcome! Happy to help."
-        elif 'what' in message_lower and any(word in message_lower for word in ['think', 'opinion']):
-            return "That's a good question. What's your take on it?"
-        else:
-            return "That's interesting! Tell me more."
+        matched = {m.lastgroup for m in _FALLBACK_RE.finditer(message.lower())}
+        for required, response in _FALLBACK_TABLE:
+            if required <= matched:
+                return response
+        return "That's interesting! Tell me more."
     
     def update_memory(self, message: Dict):
         """Update various memory systems"""
+        # Reuse the stamp the chat manager gave the message instead of taking a new one
+        timestamp = message.get("timestamp") or datetime.now().isoformat()
+        
         # Add to conversation history
         self.conversation_history.append({
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": timestamp,
             "sender": message.get("sender"),
             "content": message.get("content")
         })
         
         # Extract and store experiences
         if message.get("sender") == "James":  # Learn from the real James
-            self._extract_experience(message.get("content"))
+            self._extract_experience(message.get("content"), timestamp)
         
         # Update knowledge base
-        self._update_knowledge(message)
+        self._update_knowledge(message, timestamp)
         
-        # Maintain memory size limits
-        if len(self.conversation_history) > 100:
-            self.conversation_history = self.conversation_history[-100:]
+        if len(self.conversation_history) > self._summary_threshold:
+            self._compact_history()
     
-    def _extract_experience(self, content: str):
+    def _compact_history(self):
+        """Fold the oldest half of the raw history into the running summary"""
+        evicted = [self.conversation_history.popleft() for _ in range(len(self.conversation_history) // 2)]
+        self._summary = summarize_turns(evicted, self._summary)
+    
+    def reset_memory(self):
+        """Forget the conversation history and its summary"""
+        self.conversation_history.clear()
+        self._summary = ""
+    
+    def _extract_experience(self, content: str, timestamp: str):
         """Extract experiences from James's messages"""
         # Simple experience extraction - can be made more sophisticated
         experience = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": timestamp,
             "content": content,
             "keywords": self._extract_keywords(content)
         }
         self.experiences.append(experience)
+        self._index_experience(experience)
+        if len(self.experiences) > MAX_EXPERIENCES:
+            self._evict_experience()
         
-        # Save to experiences file
-        exp_file = "AIs/JamesClone/Memory/experiences/recent.json"
-        os.makedirs(os.path.dirname(exp_file), exist_ok=True)
-        with open(exp_file, 'w') as f:
-            json.dump(self.experiences[-50:], f, indent=2)  # Keep last 50 experiences
+        # Append just the new record to the experiences log
+        self._queue_record("exp", experience)
+        self._exp_lines += 1
+        if self._exp_lines > 2 * MAX_EXPERIENCES:
+            self._compact()
     
     def _extract_keywords(self, text: str) -> List[str]:
         """Extract keywords from text (simple implementation)"""
         # Simple keyword extraction - can be improved with NLP
-        common_words = {"the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for", "of", "with", "is", "are", "was", "were"}
-        words = text.lower().split()
-        keywords = [w for w in words if len(w) > 3 and w not in common_words]
-        return list(set(keywords))[:5]  # Top 5 unique keywords
+        seen = set()
+        keywords = []
+        for word in _WORD_RE.findall(text.lower()):
+            if word in _STOP_WORDS or word in seen:
+                continue
+            seen.add(word)
+            keywords.append(word)
+            if len(keywords) == MAX_KEYWORDS:  # First 5 unique keywords
+                break
+        return keywords
     
-    def _update_knowledge(self, message: Dict):
+    def _update_knowledge(self, message: Dict, timestamp: str):
         """Update knowledge base from conversations"""
         content = message.get("content", "")
         sender = message.get("sender", "")
         
         # Extract potential facts or information
-        if any(word in content.lower() for word in ["is", "are", "means", "defined as", "works by"]):
-            knowledge_hash = hashlib.md5(content.encode()).hexdigest()[:8]
-            self.knowledge_base[knowledge_hash] = {
+        if _FACT_RE.search(content.lower()):
+            knowledge_hash = hashlib.blake2b(content.encode("utf-8"), digest_size=4).hexdigest()
+            entry = {
                 "content": content,
                 "source": sender,
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": timestamp,
                 "keywords": self._extract_keywords(content)
             }
+            # A restated fact moves to the newest position
+            if knowledge_hash in self.knowledge_base:
+                self._unindex_knowledge(knowledge_hash, self.knowledge_base.pop(knowledge_hash))
+            self.knowledge_base[knowledge_hash] = entry
+            self._index_knowledge(knowledge_hash, entry)
+            while len(self.knowledge_base) > MAX_KNOWLEDGE:
+                self._evict_knowledge()
             
-            # Save knowledge base
-            kb_file = "AIs/JamesClone/Memory/knowledge/base.json"
-            os.makedirs(os.path.dirname(kb_file), exist_ok=True)
-            with open(kb_file, 'w') as f:
-                json.dump(self.knowledge_base, f, indent=2)
+            # Append the entry to the knowledge log; later lines win on reload
+            self._queue_record("kb", {"id": knowledge_hash, **entry})
+            self._kb_lines += 1
+            if self._kb_lines > 2 * max(len(self.knowledge_base), MAX_EXPERIENCES):
+                self._compact()
     
     def _retrieve_relevant_memory(self, query: str) -> Optional[str]:
         """Retrieve relevant memories based on the query"""
-        query_keywords = set(self._extract_keywords(query))
+        query_keywords = self._extract_keywords(query)
         
-        # Search through experiences
+        # Search through recent experiences, newest first
         relevant_memories = []
         
-        for exp in self.experiences[-20:]:  # Check recent experiences
-            exp_keywords = set(exp.get("keywords", []))
-            if query_keywords & exp_keywords:  # Intersection
-                relevant_memories.append(exp["content"])
+        exp_hits = set().union(*(self._exp_index[k] for k in query_keywords if k in self._exp_index))
+        recent = list(self._exp_by_seq)[-RECENT_EXPERIENCES:]  # Check recent experiences
+        for seq in sorted(exp_hits, reverse=True):
+            if seq < recent[0]:
+                break
+            relevant_memories.append(self._exp_by_seq[seq]["content"])
         
-        # Search through knowledge base
-        for key, knowledge in self.knowledge_base.items():
-            kb_keywords = set(knowledge.get("keywords", []))
-            if query_keywords & kb_keywords:
-                relevant_memories.append(knowledge["content"])
+        # Search through knowledge base, newest first
+        if len(relevant_memories) < 3:
+            kb_hits = set().union(*(self._kb_index[k] for k in query_keywords if k in self._kb_index))
+            kb_matches = sorted(
+                (self.knowledge_base[key] for key in kb_hits),
+                key=lambda knowledge: knowledge.get("timestamp", ""),
+                reverse=True
+            )
+            relevant_memories.extend(knowledge["content"] for knowledge in kb_matches)
         
         if relevant_memories:
             return " | ".join(relevant_memories[:3])  # Return top 3 relevant memories
         return None
     
+    def _index_experience(self, experience: Dict):
+        """Add an experience's keywords to the inverted index"""
+        for keyword in experience.get("keywords", []):
+            self._exp_index[keyword].add(self._exp_seq)
+        self._exp_by_seq[self._exp_seq] = experience
+        self._exp_seq += 1
+    
+    def _unindex_experience(self, experience: Dict, seq: int):
+        """Remove an evicted experience from the inverted index"""
+        for keyword in experience.get("keywords", []):
+            postings = self._exp_index.get(keyword)
+            if postings is not None:
+                postings.discard(seq)
+                if not postings:
+                    del self._exp_index[keyword]
+    
+    def _evict_experience(self):
+        """Drop the least informative older experience, scored by the IDF of its keywords"""
+        n = len(self.experiences)
+        seqs = list(self._exp_by_seq)
+        # The newest experiences are kept regardless of score, so a new one can't be evicted on arrival
+        candidates = seqs[:max(1, n - RECENT_EXPERIENCES)]
+        scores = [
+            sum(math.log(n / len(self._exp_index[k])) for k in self._exp_by_seq[seq].get("keywords", []))
+            for seq in candidates
+        ]
+        pos = min(range(len(candidates)), key=scores.__getitem__)  # Ties go to the oldest
+        del self.experiences[pos]
+        self._unindex_experience(self._exp_by_seq.pop(seqs[pos]), seqs[pos])
+    
+    def _index_knowledge(self, key: str, knowledge: Dict):
+        """Add a knowledge entry's keywords to the inverted index"""
+        for keyword in knowledge.get("keywords", []):
+            self._kb_index[keyword].add(key)
+    
+    def _unindex_knowledge(self, key: str, knowledge: Dict):
+        """Remove a knowledge entry from the inverted index"""
+        for keyword in knowledge.get("keywords", []):
+            postings = self._kb_index.get(keyword)
+            if postings is not None:
+                postings.discard(key)
+                if not postings:
+                    del self._kb_index[keyword]
+    
+    def _evict_knowledge(self):
+        """Drop the oldest knowledge entry"""
+        key = next(iter(self.knowledge_base))
+        self._unindex_knowledge(key, self.knowledge_base.pop(key))
+    
     def _load_memories(self):
         """Load existing memories from files"""
-        # Load conversation history
-        conv_file = "AIs/JamesClone/Memory/conversations/history.json"
-        if os.path.exists(conv_file):
-            with open(conv_file, 'r') as f:
-                self.conversation_history = json.load(f)
+        # Load conversation history, streaming records into the bounded deque
+        if os.path.exists(CONVERSATION_FILE):
+            self.conversation_history.extend(self._read_log(CONVERSATION_FILE))
+        elif os.path.exists(LEGACY_CONVERSATION_FILE):
+            self.conversation_history.extend(serialization.load(LEGACY_CONVERSATION_FILE))
+        
+        migrate = False
         
         # Load experiences
-        exp_file = "AIs/JamesClone/Memory/experiences/recent.json"
-        if os.path.exists(exp_file):
-            with open(exp_file, 'r') as f:
-                self.experiences = json.load(f)
+        self._exp_lines = 0
+        if os.path.exists(EXPERIENCES_FILE):
+            for record in self._read_log(EXPERIENCES_FILE):
+                self.experiences.append(record)
+                self._exp_lines += 1
+        elif os.path.exists(LEGACY_EXPERIENCES_FILE):
+            self.experiences.extend(serialization.load(LEGACY_EXPERIENCES_FILE))
+            migrate = True
         
         # Load knowledge base
-        kb_file = "AIs/JamesClone/Memory/knowledge/base.json"
-        if os.path.exists(kb_file):
-            with open(kb_file, 'r') as f:
-                self.knowledge_base = json.load(f)
+        self._kb_lines = 0
+        if os.path.exists(KNOWLEDGE_FILE):
+            for record in self._read_log(KNOWLEDGE_FILE):
+                self.knowledge_base[record.pop("id")] = record
+                self._kb_lines += 1
+        elif os.path.exists(LEGACY_KNOWLEDGE_FILE):
+            self.knowledge_base = serialization.load(LEGACY_KNOWLEDGE_FILE)
+            migrate = True
+        
+        # Write the logs out once so old snapshots carry over
+        if migrate:
+            self._compact()
+    
+    def _read_log(self, path: str):
+        """Yield records from a JSONL log, skipping torn or blank lines"""
+        with open(path, 'rb') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    yield serialization.loads(line)
+                except ValueError:
+                    continue
+    
+    def _open_memory_logs(self):
+        """Open the experience and knowledge logs in append mode"""
+        self._exp_log = open(EXPERIENCES_FILE, 'ab', buffering=serialization.WRITE_BUFFER_SIZE)
+        self._kb_log = open(KNOWLEDGE_FILE, 'ab', buffering=serialization.WRITE_BUFFER_SIZE)
+    
+    def _queue_record(self, log: str, record: Dict):
+        """Buffer a record for a memory log, scheduling a flush if none is pending"""
+        with self._flush_lock:
+            self._pending[log].append(serialization.dumps_line(record))
+            if self._flush_timer is None:
+                self._flush_timer = threading.Timer(FLUSH_INTERVAL, self._flush)
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+    
+    def _flush(self):
+        """Write all buffered records to the memory logs"""
+        with self._flush_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if self._exp_log is None and (self._pending["exp"] or self._pending["kb"]):
+                self._open_memory_logs()  # Reopen after close()
+            for log, f in (("exp", self._exp_log), ("kb", self._kb_log)):
+                if self._pending[log] and f:
+                    f.writelines(self._pending[log])
+                    f.flush()
+                    self._pending[log].clear()
+    
+    def _compact(self):
+        """Rewrite the memory logs so they only hold the retained records"""
+        with self._flush_lock:
+            for log in (self._exp_log, self._kb_log):
+                if log:
+                    log.close()
+            
+            # The rewrite covers everything still buffered
+            for pending in self._pending.values():
+                pending.clear()
+            
+            self._write_log(EXPERIENCES_FILE, self.experiences)
+            self._exp_lines = len(self.experiences)
+            
+            self._write_log(
+                KNOWLEDGE_FILE,
+                ({"id": key, **entry} for key, entry in self.knowledge_base.items())
+            )
+            self._kb_lines = len(self.knowledge_base)
+            
+            if self._exp_log:
+                self._open_memory_logs()
+    
+    def _write_log(self, path: str, records):
+        """Atomically replace a JSONL log with the given records"""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'wb', buffering=serialization.WRITE_BUFFER_SIZE) as f:
+            for record in records:
+                f.write(serialization.dumps_line(record))
+        os.replace(tmp_path, path)
     
     def get_info(self) -> Dict:
         """Get information about this AI agent"""
@@ -308,18 +630,28 @@ Be yourself while being receptive to learning and adapting your communication st
             "personality_traits": len(self.personality.get("traits", []))
         }
     
+    def close(self):
+        """Flush buffered memory records and close the logs"""
+        self._flush()
+        with self._flush_lock:
+            for log in (self._exp_log, self._kb_log):
+                if log:
+                    log.close()
+            self._exp_log = None
+            self._kb_log = None
+    
     def save_state(self, filepath: str):
         """Save complete state"""
+        self._flush()
+        
         state = {
-            "conversation_history": self.conversation_history,
-            "experiences": self.experiences,
+            "conversation_history": list(self.conversation_history),
+            "experiences": list(self.experiences),
             "knowledge_base": self.knowledge_base,
+            "summary": self._summary,
             "config": self.config
         }
-        with open(filepath, 'w') as f:
-            json.dump(state, f, indent=2)
+        serialization.dump(state, filepath)
         
         # Also save individual memory components
-        os.makedirs("AIs/JamesClone/Memory/conversations", exist_ok=True)
-        with open("AIs/JamesClone/Memory/conversations/history.json", 'w') as f:
-            json.dump(self.conversation_history, f, indent=2)
\ No newline at end of file
+        self._write_log(CONVERSATION_FILE, self.conversation_history)
\ No newline at end of file
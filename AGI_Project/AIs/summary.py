@@ -0,0 +1,39 @@
+"""
+Conversation Summary - Compacts old turns into a short running summary
+"""
+
+import re
+from typing import Dict, Iterable
+
+_WORD_RE = re.compile(r"[a-z]{4,}")
+_STOP_WORDS = frozenset({"that", "this", "with", "have", "what", "your", "about", "just", "from", "they", "will", "would", "could", "should", "there", "their", "were", "been", "into", "than", "then", "them", "also", "some", "when", "which"})
+
+MAX_TOPICS = 8  # Topics kept per sender for each compacted batch
+MAX_SUMMARY_CHARS = 1000
+
+
+def summarize_turns(turns: Iterable[Dict], summary: str = "") -> str:
+    """Fold a batch of old turns into the running summary as per-sender topic lists"""
+    topics = {}
+    for turn in turns:
+        content = turn.get("content") or ""
+        counts = topics.setdefault(turn.get("sender") or "Unknown", {})
+        for word in _WORD_RE.findall(content.lower()):
+            if word not in _STOP_WORDS:
+                counts[word] = counts.get(word, 0) + 1
+
+    parts = []
+    for sender, counts in topics.items():
+        top = sorted(counts, key=counts.get, reverse=True)[:MAX_TOPICS]
+        if top:
+            parts.append(f"{sender} talked about {', '.join(top)}")
+
+    if not parts:
+        return summary
+
+    summary = f"{summary} {'; '.join(parts)}." if summary else f"{'; '.join(parts)}."
+
+    # Keep the most recent part of the summary, cut at a word boundary
+    if len(summary) > MAX_SUMMARY_CHARS:
+        summary = summary[-MAX_SUMMARY_CHARS:].split(" ", 1)[-1]
+    return summary
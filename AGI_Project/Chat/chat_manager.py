@@ -2,29 +2,54 @@
 Chat Manager - Orchestrates conversations between all participants
 """
 
-import json
 import os
+import time
+import logging
+import atexit
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
 import threading
 import queue
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed, TimeoutError as FutureTimeoutError
 
+import serialization
 from AIs.Claude.claude_ai import ClaudeAI
 from AIs.JamesClone.james_ai import JamesCloneAI
 from Chat.memory_system import MemorySystem
 from Chat.message_handler import MessageHandler
 
+logger = logging.getLogger(__name__)
+
+# Append-only session logs (one JSON record per line)
+SESSION_FILE = "Data/active_session.jsonl"
+HISTORY_FILE = "Data/chat_history.jsonl"
+
+# Pre-JSONL snapshot files, read once to migrate existing sessions
+LEGACY_SESSION_FILE = "Data/active_session.json"
+LEGACY_HISTORY_FILE = "Data/chat_history.json"
+
+CONTEXT_WINDOW = 20  # Recent messages passed to the agents as context
+AGENT_POOL_HEADROOM = 4  # Workers per agent, so calls still running past the deadline don't starve later turns
+
 
 class ChatManager:
     def __init__(self, config: Dict, debug: bool = False):
         """Initialize the chat manager with all AI agents"""
         self.config = config
         self.debug = debug
+        if debug:
+            logger.setLevel(logging.DEBUG)
         
         # Initialize AI agents
         self.agents = {}
         self._initialize_agents()
         
+        # Worker threads for agent calls, reused across turns
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, len(self.agents)) * AGENT_POOL_HEADROOM, thread_name_prefix="agent"
+        )
+        
         # Initialize memory system
         self.memory_system = MemorySystem(config.get("memory_settings", {}))
         
@@ -32,18 +57,44 @@ class ChatManager:
         self.message_handler = MessageHandler()
         
         # Chat state
-        self.active_session = {
-            "session_id": datetime.now().strftime("%Y%m%d_%H%M%S"),
-            "started_at": datetime.now().isoformat(),
-            "participants": ["James", "Claude", "James (Clone)"],
-            "messages": []
-        }
+        self.active_session = self._new_session()
         
         # Message queue for async processing
         self.message_queue = queue.Queue()
         
+        # Rolling window of the latest messages, kept alongside the full list
+        self._recent = deque(maxlen=CONTEXT_WINDOW)
+        
+        # Session logs, opened on the first save
+        chat_settings = config.get("chat_settings", {})
+        self._session_file = chat_settings.get("session_file", SESSION_FILE)
+        self._history_file = chat_settings.get("history_file", HISTORY_FILE)
+        self._session_fp = None
+        self._history_fp = None
+        self._saved_count = 0  # Messages already appended to the logs
+        self._history_sessions = None  # Sessions in the history log, counted on first use
+        
         # Load previous session if exists
         self._load_session()
+        
+        # Saves are batched: turns mark the session dirty and a background thread flushes it
+        self._flush_interval = chat_settings.get("flush_interval_ms", 500) / 1000
+        self._session_lock = threading.RLock()
+        self._dirty = threading.Event()
+        self._flush_thread = threading.Thread(target=self._flush_loop, name="session-flush", daemon=True)
+        self._flush_thread.start()
+        self._closed = False
+        atexit.register(self.close)
+    
+    def _new_session(self, messages: Optional[List[Dict]] = None) -> Dict:
+        """Create an empty session stamped with the current time, reusing an emptied message list if given"""
+        now = datetime.now()
+        return {
+            "session_id": now.strftime("%Y%m%d_%H%M%S"),
+            "started_at": now.isoformat(),
+            "participants": ["James", "Claude", "James (Clone)"],
+            "messages": messages if messages is not None else []
+        }
     
     def _initialize_agents(self):
         """Initialize all AI agents"""
@@ -53,89 +104,99 @@ class ChatManager:
         if "claude" in ai_configs:
             try:
                 self.agents["Claude"] = ClaudeAI(ai_configs["claude"])
-                if self.debug:
-                    print("* Claude AI initialized")
+                logger.debug("Claude AI initialized")
             except Exception as e:
-                print(f"Failed to initialize Claude: {e}")
+                logger.warning("Failed to initialize Claude: %s", e)
                 self.agents["Claude"] = None
         
         # Initialize James Clone
         if "james_clone" in ai_configs:
             try:
                 self.agents["James (Clone)"] = JamesCloneAI(ai_configs["james_clone"])
-                if self.debug:
-                    print("* James Clone AI initialized")
+                logger.debug("James Clone AI initialized")
             except Exception as e:
-                print(f"Failed to initialize James Clone: {e}")
+                logger.warning("Failed to initialize James Clone: %s", e)
                 self.agents["James (Clone)"] = None
     
     def send_message(self, sender: str, content: str) -> Dict:
         """Send a message from a participant"""
-        # Create message object
-        message = {
-            "id": len(self.active_session["messages"]) + 1,
-            "timestamp": datetime.now().isoformat(),
-            "sender": sender,
-            "content": content,
-            "responses": {}
-        }
-        
-        # Add to session
-        self.active_session["messages"].append(message)
-        
-        # Update memory for all agents
-        for agent_name, agent in self.agents.items():
-            if agent and agent_name != sender:
-                agent.update_memory(message)
-        
-        # Save to memory system
-        self.memory_system.add_message(message)
+        # The lock covers session changes only, so saves aren't held up while agents reply
+        with self._session_lock:
+            # Create message object
+            message = {
+                "id": len(self.active_session["messages"]) + 1,
+                "timestamp": datetime.now().isoformat(),
+                "sender": sender,
+                "content": content,
+                "responses": {}
+            }
+            
+            # Add to session
+            self.active_session["messages"].append(message)
+            self._recent.append(message)
+            
+            # Update memory for all agents
+            for agent_name, agent in self.agents.items():
+                if agent and agent_name != sender:
+                    agent.update_memory(message)
+            
+            # Save to memory system
+            self.memory_system.add_message(message)
+            
+            # Snapshot the context the agents reply to
+            context = list(self._recent)  # Last 20 messages for context
         
         # Get responses from AI agents (if sender is not an AI)
         if sender == "James":  # Human user
-            responses = self._get_ai_responses(message)
+            responses = self._get_ai_responses(message, context)
             message["responses"] = responses
         
-        # Auto-save session
+        # Auto-save session on the background flush thread
         if self.config.get("chat_settings", {}).get("save_history", True):
-            self.save_session()
+            self._dirty.set()
         
         return message
     
-    def _get_ai_responses(self, message: Dict) -> Dict:
+    def _get_ai_responses(self, message: Dict, context: List[Dict]) -> Dict:
         """Get responses from all AI agents"""
         responses = {}
-        context = self.active_session["messages"][-20:]  # Last 20 messages for context
-        
-        # Get responses in parallel using threads
-        threads = []
-        response_queue = queue.Queue()
         
+        # Get responses in parallel on the agent pool
+        futures = {}
         for agent_name, agent in self.agents.items():
             if agent and agent_name != message["sender"]:
-                thread = threading.Thread(
-                    target=self._get_agent_response,
-                    args=(agent_name, agent, message["content"], context, response_queue)
-                )
-                thread.start()
-                threads.append(thread)
+                future = self._executor.submit(agent.generate_response, message["content"], context)
+                futures[future] = agent_name
         
-        # Wait for all responses
-        for thread in threads:
-            thread.join(timeout=30)  # 30 second timeout per agent
+        # Handle each response as soon as it arrives, sharing one 30 second deadline
+        try:
+            for future in as_completed(futures, timeout=30):
+                self._add_agent_response(message, futures[future], future, responses)
+        except FutureTimeoutError:
+            logger.debug("Timed out waiting for agent responses")
         
-        # Collect responses
-        while not response_queue.empty():
-            agent_name, response = response_queue.get()
-            responses[agent_name] = {
-                "content": response,
-                "timestamp": datetime.now().isoformat()
-            }
-            
+        return responses
+    
+    def _add_agent_response(self, message: Dict, agent_name: str, future: Future, responses: Dict):
+        """Record a finished agent response and share it with the other agents"""
+        try:
+            response = future.result()
+        except Exception as e:
+            logger.debug("Error getting response from %s: %s", agent_name, e)
+            response = f"[Error: {str(e)}]"
+        
+        # One timestamp for the response and its message
+        timestamp = datetime.now().isoformat()
+        responses[agent_name] = {
+            "content": response,
+            "timestamp": timestamp
+        }
+        
+        with self._session_lock:
             # Create a message for this response
             response_message = {
                 "id": len(self.active_session["messages"]) + 1,
-                "timestamp": datetime.now().isoformat(),
+                "timestamp": timestamp,
                 "sender": agent_name,
                 "content": response,
                 "is_response_to": message["id"]
@@ -143,6 +204,7 @@ class ChatManager:
             
             # Add to session
             self.active_session["messages"].append(response_message)
+            self._recent.append(response_message)
             
             # Update other agents' memory
             for other_agent_name, other_agent in self.agents.items():
@@ -151,21 +213,11 @@ class ChatManager:
             
             # Save to memory system
             self.memory_system.add_message(response_message)
-        
-        return responses
-    
-    def _get_agent_response(self, agent_name: str, agent, content: str, context: List[Dict], response_queue: queue.Queue):
-        """Get response from a single agent (runs in thread)"""
-        try:
-            response = agent.generate_response(content, context)
-            response_queue.put((agent_name, response))
-        except Exception as e:
-            if self.debug:
-                print(f"Error getting response from {agent_name}: {e}")
-            response_queue.put((agent_name, f"[Error: {str(e)}]"))
     
     def get_conversation_history(self, limit: int = 50) -> List[Dict]:
         """Get recent conversation history"""
+        if 0 < limit <= CONTEXT_WINDOW:
+            return list(self._recent)[-limit:]
         return self.active_session["messages"][-limit:]
     
     def get_session_info(self) -> Dict:
@@ -182,111 +234,266 @@ class ChatManager:
         }
     
     def save_session(self):
-        """Save current session to file"""
-        session_file = self.config.get("chat_settings", {}).get("session_file", "Data/active_session.json")
-        os.makedirs(os.path.dirname(session_file), exist_ok=True)
-        
-        with open(session_file, 'w') as f:
-            json.dump(self.active_session, f, indent=2)
-        
-        # Also save to history
-        history_file = self.config.get("chat_settings", {}).get("history_file", "Data/chat_history.json")
-        self._append_to_history(history_file)
-        
-        # Save individual agent states
-        for agent_name, agent in self.agents.items():
-            if agent:
-                state_file = f"Data/agent_states/{agent_name.replace(' ', '_')}_state.json"
-                os.makedirs(os.path.dirname(state_file), exist_ok=True)
-                agent.save_state(state_file)
+        """Append messages added since the last save to the session and history logs"""
+        with self._session_lock:
+            self._append_unsaved()
+            self._session_fp.flush()
+            self._history_fp.flush()
+            
+            # Save individual agent states
+            for agent_name, agent in self.agents.items():
+                if agent:
+                    state_file = f"Data/agent_states/{agent_name.replace(' ', '_')}_state.json"
+                    os.makedirs(os.path.dirname(state_file), exist_ok=True)
+                    agent.save_state(state_file)
     
-    def _append_to_history(self, history_file: str):
-        """Append current session to history file"""
-        os.makedirs(os.path.dirname(history_file), exist_ok=True)
-        
-        # Load existing history
-        history = []
-        if os.path.exists(history_file):
+    def _flush_loop(self):
+        """Save the session shortly after it is marked dirty, so bursts share one save"""
+        while True:
+            self._dirty.wait()
+            time.sleep(self._flush_interval)
             try:
-                with open(history_file, 'r') as f:
-                    history = json.load(f)
-            except:
-                history = []
+                self._flush()
+            except Exception as e:
+                logger.debug("Could not save session: %s", e)
+    
+    def _flush(self):
+        """Save the session if it has unsaved changes"""
+        if self._dirty.is_set():
+            self._dirty.clear()
+            self.save_session()
+    
+    def _append_unsaved(self):
+        """Append messages added since the last save to the logs, opening them if needed"""
+        if self._session_fp is None:
+            self._open_session_logs()
         
-        # Find or create session in history
-        session_found = False
-        for i, session in enumerate(history):
-            if session.get("session_id") == self.active_session["session_id"]:
-                history[i] = self.active_session
-                session_found = True
-                break
+        messages = self.active_session["messages"]
+        for msg in messages[self._saved_count:]:
+            self._append_record({"type": "message", **msg})
+        self._saved_count = len(messages)
+    
+    def _append_record(self, record: Dict):
+        """Append a record to the session log and, tagged with the session id, to the history log"""
+        self._session_fp.write(serialization.dumps_line(record))
+        self._history_fp.write(serialization.dumps_line({**record, "session_id": self.active_session["session_id"]}))
+    
+    def _open_session_logs(self):
+        """Open the session and history logs, starting a new session log unless resuming one"""
+        for path in (self._session_file, self._history_file):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
         
-        if not session_found:
-            history.append(self.active_session)
+        if self._saved_count:
+            # Resuming the logged session; its records are already in both logs
+            self._history_fp = open(self._history_file, 'ab', buffering=serialization.WRITE_BUFFER_SIZE)
+            self._session_fp = open(self._session_file, 'ab', buffering=serialization.WRITE_BUFFER_SIZE)
+            return
         
-        # Limit history size
+        self._trim_history()
+        self._history_fp = open(self._history_file, 'ab', buffering=serialization.WRITE_BUFFER_SIZE)
+        self._session_fp = open(self._session_file, 'wb', buffering=serialization.WRITE_BUFFER_SIZE)
+        metadata = {key: value for key, value in self.active_session.items() if key != "messages"}
+        self._append_record({"type": "session_metadata", **metadata})
+        self._history_sessions += 1
+    
+    def _close_session_logs(self):
+        """Close the session and history logs"""
+        for fp in (self._session_fp, self._history_fp):
+            if fp:
+                fp.close()
+        self._session_fp = None
+        self._history_fp = None
+    
+    def _trim_history(self):
+        """Drop the oldest sessions so a new one fits within max_history_size"""
         max_history = self.config.get("chat_settings", {}).get("max_history_size", 1000)
-        if len(history) > max_history:
-            history = history[-max_history:]
         
-        # Save updated history
-        with open(history_file, 'w') as f:
-            json.dump(history, f, indent=2)
+        if os.path.exists(self._history_file):
+            # Count the logged sessions once; new sessions keep the count current
+            if self._history_sessions is None:
+                self._history_sessions = sum(
+                    1 for record in self._read_log(self._history_file)
+                    if record.get("type") == "session_metadata"
+                )
+            if self._history_sessions < max_history:
+                return
+            session_ids = [
+                record["session_id"] for record in self._read_log(self._history_file)
+                if record.get("type") == "session_metadata"
+            ]
+            records = self._read_log(self._history_file)
+        elif os.path.exists(LEGACY_HISTORY_FILE):
+            # Convert the old snapshot; the active session is logged again when it opens
+            try:
+                history = serialization.load(LEGACY_HISTORY_FILE)
+            except (OSError, ValueError):
+                self._history_sessions = 0
+                return
+            history = [session for session in history if session.get("session_id") != self.active_session["session_id"]]
+            session_ids = [session["session_id"] for session in history]
+            records = self._iter_legacy_history(history)
+        else:
+            self._history_sessions = 0
+            return
+        
+        # Keep room for the session about to be started
+        kept = set(session_ids[max(0, len(session_ids) - max_history + 1):])
+        tmp_path = self._history_file + ".tmp"
+        self._history_sessions = 0
+        with open(tmp_path, 'wb', buffering=serialization.WRITE_BUFFER_SIZE) as f:
+            for record in records:
+                if record.get("session_id") in kept:
+                    f.write(serialization.dumps_line(record))
+                    self._history_sessions += record.get("type") == "session_metadata"
+        os.replace(tmp_path, self._history_file)
+    
+    def _iter_legacy_history(self, history: List[Dict]):
+        """Yield history log records for sessions from the old snapshot format"""
+        for session in history:
+            metadata = {key: value for key, value in session.items() if key != "messages"}
+            yield {"type": "session_metadata", **metadata}
+            for msg in session.get("messages", []):
+                yield {"type": "message", **msg, "session_id": session["session_id"]}
+    
+    def _read_log(self, path: str):
+        """Yield records from a JSONL log, skipping torn or blank lines"""
+        with open(path, 'rb') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    yield serialization.loads(line)
+                except ValueError:
+                    continue
     
     def _load_session(self):
         """Load previous session if exists"""
-        session_file = self.config.get("chat_settings", {}).get("session_file", "Data/active_session.json")
-        
-        if os.path.exists(session_file):
-            try:
-                with open(session_file, 'r') as f:
-                    loaded_session = json.load(f)
-                    
-                # Check if session is from today
-                session_date = datetime.fromisoformat(loaded_session["started_at"]).date()
-                if session_date == datetime.now().date():
-                    self.active_session = loaded_session
-                    if self.debug:
-                        print(f"* Loaded previous session with {len(self.active_session['messages'])} messages")
-            except Exception as e:
-                if self.debug:
-                    print(f"Could not load previous session: {e}")
+        try:
+            if os.path.exists(self._session_file):
+                loaded_session = None
+                for record in self._read_log(self._session_file):
+                    if record.pop("type", None) == "session_metadata":
+                        loaded_session = {**record, "messages": []}
+                    elif loaded_session is not None:
+                        loaded_session["messages"].append(record)
+                resumed = True
+            elif os.path.exists(LEGACY_SESSION_FILE):
+                loaded_session = serialization.load(LEGACY_SESSION_FILE)
+                resumed = False
+            else:
+                return
+            
+            # Check if session is from today
+            if loaded_session is None:
+                return
+            session_date = datetime.fromisoformat(loaded_session["started_at"]).date()
+            if session_date == datetime.now().date():
+                self.active_session = loaded_session
+                self._recent.extend(loaded_session["messages"][-CONTEXT_WINDOW:])
+                if resumed:
+                    self._saved_count = len(loaded_session["messages"])
+                logger.debug("Loaded previous session with %d messages", len(self.active_session["messages"]))
+        except Exception as e:
+            logger.debug("Could not load previous session: %s", e)
     
     def clear_session(self):
         """Clear current session and start fresh"""
-        self.active_session = {
-            "session_id": datetime.now().strftime("%Y%m%d_%H%M%S"),
-            "started_at": datetime.now().isoformat(),
-            "participants": ["James", "Claude", "James (Clone)"],
-            "messages": []
-        }
-        
-        # Clear agent memories
-        for agent in self.agents.values():
-            if agent:
-                agent.conversation_history = []
-        
-        if self.debug:
-            print("* Session cleared")
+        with self._session_lock:
+            # Log what is still unsaved, then archive the finished session log
+            # instead of rewriting it
+            if len(self.active_session["messages"]) > self._saved_count:
+                self._append_unsaved()
+            self._close_session_logs()
+            if os.path.exists(self._session_file):
+                os.replace(self._session_file, self._archive_path(self.active_session["session_id"]))
+            
+            messages = self.active_session["messages"]
+            messages.clear()
+            self.active_session = self._new_session(messages)
+            self._recent.clear()
+            
+            # Start the new session log with its metadata record
+            self._saved_count = 0
+            self._open_session_logs()
+            self._session_fp.flush()
+            self._history_fp.flush()
+            
+            # Clear agent memories and release their processes and files
+            for agent in self.agents.values():
+                if agent:
+                    agent.reset_memory()
+            self._close_agents()
+            
+            logger.debug("Session cleared")
+    
+    def _archive_path(self, session_id: str) -> str:
+        """Unused archive path for a finished session log, named after its session"""
+        base = f"{self._session_file}.{session_id}"
+        path = base + ".closed"
+        n = 1
+        while os.path.exists(path):  # Sessions cleared within the same second
+            path = f"{base}_{n}.closed"
+            n += 1
+        return path
+    
+    def _close_agents(self):
+        """Close agents that hold processes, timers or open files; they reopen on next use"""
+        for agent_name, agent in self.agents.items():
+            if agent and hasattr(agent, "close"):
+                try:
+                    agent.close()
+                except Exception as e:
+                    logger.warning("Failed to close %s: %s", agent_name, e)
+    
+    def close(self):
+        """Save unsaved messages, then close the agents, the memory system and the session logs"""
+        with self._session_lock:
+            if self._closed:
+                return
+            self._closed = True
+            
+            try:
+                self._flush()
+            except Exception as e:
+                logger.warning("Could not save session: %s", e)
+            self._close_agents()
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self.memory_system.close()
+            self._close_session_logs()
     
     def export_conversation(self, format: str = "json") -> str:
         """Export conversation in various formats"""
+        return "".join(self.export_conversation_iter(format))
+    
+    def export_conversation_iter(self, format: str = "json") -> Iterator[str]:
+        """Export conversation as a stream of text chunks, so it can be written without building one string"""
         if format == "json":
-            return json.dumps(self.active_session, indent=2)
+            return self._iter_json_export()
         elif format == "text":
-            lines = []
-            lines.append(f"Chat Session: {self.active_session['session_id']}")
-            lines.append(f"Started: {self.active_session['started_at']}")
-            lines.append("=" * 50)
-            
-            for msg in self.active_session["messages"]:
-                lines.append(f"\n[{msg['timestamp']}] {msg['sender']}:")
-                lines.append(msg['content'])
-                
-                if msg.get('responses'):
-                    for responder, response in msg['responses'].items():
-                        lines.append(f"\n  -> {responder}: {response['content']}")
-            
-            return "\n".join(lines)
+            return self._iter_text_export()
         else:
-            raise ValueError(f"Unsupported export format: {format}")
\ No newline at end of file
+            raise ValueError(f"Unsupported export format: {format}")
+    
+    def _iter_json_export(self) -> Iterator[str]:
+        """Yield the session as a JSON object, one message per line"""
+        metadata = {key: value for key, value in self.active_session.items() if key != "messages"}
+        yield serialization.dumps(metadata).decode("utf-8")[:-1]
+        yield ',"messages":['
+        for i, msg in enumerate(self.active_session["messages"]):
+            yield ",\n" if i else "\n"
+            yield serialization.dumps(msg).decode("utf-8")
+        yield "\n]}"
+    
+    def _iter_text_export(self) -> Iterator[str]:
+        """Yield the session as a plain-text transcript"""
+        yield f"Chat Session: {self.active_session['session_id']}\n"
+        yield f"Started: {self.active_session['started_at']}\n"
+        yield "=" * 50
+        
+        for msg in self.active_session["messages"]:
+            yield f"\n\n[{msg['timestamp']}] {msg['sender']}:\n"
+            yield msg['content']
+            
+            if msg.get('responses'):
+                for responder, response in msg['responses'].items():
+                    yield f"\n\n  -> {responder}: {response['content']}"
\ No newline at end of file
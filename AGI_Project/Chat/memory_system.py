@@ -2,12 +2,128 @@
 Memory System - Handles persistent memory across sessions
 """
 
-import json
 import os
+import re
+import time
+import logging
+import atexit
 from datetime import datetime
 from typing import Dict, List, Optional
 import sqlite3
 import hashlib
+import threading
+import queue
+
+import serialization
+
+logger = logging.getLogger(__name__)
+
+WRITE_BATCH_SIZE = 64  # Queued messages committed per transaction
+WRITE_BATCH_WAIT = 0.05  # Seconds the writer waits for more messages to fill a batch
+WRITE_QUEUE_SIZE = 10_000  # Queued messages before add_message applies back-pressure
+STATEMENT_CACHE_SIZE = 256  # Compiled statements kept per connection
+FLUSH_TIMEOUT = 5.0  # Seconds flush and close wait for the writer before giving up
+
+# Keyword extraction
+_COMMON_WORDS = frozenset({"the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for", "of", "with", "is", "are", "was", "were", "be", "been", "being", "have", "has", "had", "do", "does", "did", "will", "would", "could", "should", "may", "might", "must", "shall", "can", "need"})
+_TOKEN_RE = re.compile(r"[a-z]{4,}")
+MAX_KEYWORDS = 10
+
+# Experience indicators and factual patterns, each fused into one alternation
+_EXPERIENCE_RE = re.compile("|".join(map(re.escape, (
+    "i learned", "i discovered", "i found out", "i realized",
+    "turns out", "apparently", "interestingly", "surprisingly"
+))))
+_FACT_RE = re.compile("|".join(map(re.escape, (
+    " is ", " are ", " means ", " refers to ", " defined as ",
+    " works by ", " consists of ", " includes ", " requires "
+))))
+
+# Knowledge categories, one alternation each; the first category that matches wins,
+# so the order is part of the behaviour
+_CATEGORY_PATTERNS = [
+    (category, re.compile("|".join(map(re.escape, keywords))))
+    for category, keywords in (
+        ("technical", ("code", "programming", "software", "algorithm", "api", "function", "class", "method")),
+        ("ai", ("ai", "artificial intelligence", "machine learning", "neural", "model", "training")),
+        ("general", ("fact", "information", "data", "statistic")),
+        ("personal", ("i am", "my", "me", "james", "claude")),
+        ("process", ("how to", "steps", "process", "procedure", "method")),
+    )
+]
+
+# Full-text indexes: (table, FTS table, indexed columns)
+_FTS_TABLES = (
+    ("conversations", "conversations_fts", ("content", "keywords")),
+    ("experiences", "experiences_fts", ("content", "keywords")),
+    ("knowledge", "knowledge_fts", ("fact", "keywords")),
+)
+_SEARCH_WORD_RE = re.compile(r"\w+")
+
+# Statements issued on every write or search, shared so each connection compiles them once
+_SQL_INSERT_CONVERSATION = """
+    INSERT INTO conversations (timestamp, sender, content, session_id, keywords)
+    VALUES (?, ?, ?, ?, ?)
+"""
+_SQL_INSERT_EXPERIENCE = """
+    INSERT INTO experiences (timestamp, source, content, importance, keywords)
+    VALUES (?, ?, ?, ?, ?)
+"""
+# Facts that are already known are skipped on their primary key
+_SQL_INSERT_KNOWLEDGE = """
+    INSERT OR IGNORE INTO knowledge (id, timestamp, source, fact, confidence, keywords, category)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+
+_SQL_SEARCH_CONVERSATIONS_FTS = """
+    SELECT c.timestamp, c.sender, c.content
+    FROM conversations_fts JOIN conversations c ON c.id = conversations_fts.rowid
+    WHERE conversations_fts MATCH ?
+    ORDER BY bm25(conversations_fts)
+    LIMIT ?
+"""
+_SQL_SEARCH_CONVERSATIONS_LIKE = """
+    SELECT timestamp, sender, content FROM conversations
+    WHERE content LIKE ? OR keywords LIKE ?
+    ORDER BY timestamp DESC
+    LIMIT ?
+"""
+_SQL_SEARCH_EXPERIENCES_FTS = """
+    SELECT e.timestamp, e.source, e.content, e.importance
+    FROM experiences_fts JOIN experiences e ON e.id = experiences_fts.rowid
+    WHERE experiences_fts MATCH ?
+    ORDER BY bm25(experiences_fts)
+    LIMIT ?
+"""
+_SQL_SEARCH_EXPERIENCES_LIKE = """
+    SELECT timestamp, source, content, importance FROM experiences
+    WHERE content LIKE ? OR keywords LIKE ?
+    ORDER BY importance DESC, timestamp DESC
+    LIMIT ?
+"""
+_SQL_SEARCH_KNOWLEDGE_FTS = """
+    SELECT timestamp, source, fact, confidence, category FROM knowledge
+    WHERE rowid IN (SELECT rowid FROM knowledge_fts WHERE knowledge_fts MATCH ?)
+    OR category = ?
+    ORDER BY confidence DESC
+    LIMIT ?
+"""
+_SQL_SEARCH_KNOWLEDGE_LIKE = """
+    SELECT timestamp, source, fact, confidence, category FROM knowledge
+    WHERE fact LIKE ? OR keywords LIKE ? OR category = ?
+    ORDER BY confidence DESC
+    LIMIT ?
+"""
+
+# Export sections: (key, memory type, columns, query), newest or most important first
+_EXPORT_QUERIES = (
+    ("conversations", "conversation", ("timestamp", "sender", "content"),
+     "SELECT timestamp, sender, content FROM conversations ORDER BY timestamp DESC"),
+    ("experiences", "experience", ("timestamp", "source", "content", "importance"),
+     "SELECT timestamp, source, content, importance FROM experiences ORDER BY importance DESC, timestamp DESC"),
+    ("knowledge", "knowledge", ("timestamp", "source", "fact", "confidence", "category"),
+     "SELECT timestamp, source, fact, confidence, category FROM knowledge ORDER BY confidence DESC"),
+)
 
 
 class MemorySystem:
@@ -24,8 +140,17 @@ class MemorySystem:
         
         # Initialize SQLite database for efficient querying
         self.db_path = os.path.join(self.memory_base_path, "memory.db")
+        self._lock = threading.Lock()
         self._init_database()
         
+        # Writes are queued and committed in batches by a background thread that owns
+        # its own connection; self._conn and its lock serve readers and maintenance
+        self._write_queue = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+        self._writer = threading.Thread(target=self._writer_loop, name="memory-writer", daemon=True)
+        self._writer.start()
+        self._closed = False
+        atexit.register(self.close)
+        
         # In-memory caches
         self.conversation_cache = []
         self.experience_cache = []
@@ -33,8 +158,19 @@ class MemorySystem:
     
     def _init_database(self):
         """Initialize SQLite database for memory storage"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        # One connection for the lifetime of the memory system, in autocommit mode
+        self._conn = sqlite3.connect(
+            self.db_path, check_same_thread=False, isolation_level=None,
+            cached_statements=STATEMENT_CACHE_SIZE
+        )
+        cursor = self._conn.cursor()
+        
+        # WAL lets readers run alongside the writer; NORMAL sync is safe under WAL
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA mmap_size=268435456")
+        cursor.execute("PRAGMA cache_size=-65536")
         
         # Conversations table
         cursor.execute("""
@@ -79,274 +215,350 @@ class MemorySystem:
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_exp_timestamp ON experiences(timestamp)")
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_knowledge_category ON knowledge(category)")
         
-        conn.commit()
-        conn.close()
+        # Full-text search, when this SQLite build has FTS5
+        self._fts_enabled = self._init_fts(cursor)
+    
+    def _init_fts(self, cursor) -> bool:
+        """Create FTS5 indexes kept in sync by triggers; return False if FTS5 is unavailable"""
+        try:
+            for table, fts, columns in _FTS_TABLES:
+                exists = cursor.execute("SELECT 1 FROM sqlite_master WHERE name = ?", (fts,)).fetchone()
+                
+                cursor.execute(f"""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+                        {", ".join(columns)},
+                        content='{table}', content_rowid='rowid', tokenize='porter unicode61'
+                    )
+                """)
+                cursor.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} BEGIN
+                        INSERT INTO {fts}(rowid, {", ".join(columns)})
+                        VALUES (new.rowid, {", ".join("new." + column for column in columns)});
+                    END
+                """)
+                cursor.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} BEGIN
+                        INSERT INTO {fts}({fts}, rowid, {", ".join(columns)})
+                        VALUES ('delete', old.rowid, {", ".join("old." + column for column in columns)});
+                    END
+                """)
+                
+                # Index rows stored before the FTS table existed
+                if not exists:
+                    cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+            return True
+        except sqlite3.OperationalError:
+            return False
     
     def add_message(self, message: Dict):
         """Add a message to conversation memory"""
         if not self.enabled:
             return
         
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        keywords = self._extract_keywords(message.get("content", ""))
+        # Lowercase and tokenize the content once for every row; keywords are stored
+        # space-separated so the FTS tokenizer indexes them directly
+        content_lower = message.get("content", "").lower()
+        keywords = " ".join(self._extract_keywords(content_lower))
         
-        cursor.execute("""
-            INSERT INTO conversations (timestamp, sender, content, session_id, keywords)
-            VALUES (?, ?, ?, ?, ?)
-        """, (
+        conversation_row = (
             message.get("timestamp", datetime.now().isoformat()),
             message.get("sender", "Unknown"),
             message.get("content", ""),
             message.get("session_id", ""),
-            json.dumps(keywords)
-        ))
-        
-        conn.commit()
-        conn.close()
+            keywords
+        )
         
         # Update cache
         self.conversation_cache.append(message)
         if len(self.conversation_cache) > 100:
             self.conversation_cache = self.conversation_cache[-100:]
         
-        # Check for experiences and knowledge
-        self._extract_experience(message)
-        self._extract_knowledge(message)
+        # Check for experiences and knowledge, then hand all rows to the writer
+        rows = (
+            conversation_row,
+            self._extract_experience(message, content_lower, keywords),
+            self._extract_knowledge(message, content_lower, keywords)
+        )
+        try:
+            self._write_queue.put(rows, timeout=1.0)
+        except queue.Full:
+            logger.warning("Memory write queue is full; message not stored")
+    
+    def _writer_loop(self):
+        """Drain queued rows into the database, one transaction per batch, until closed"""
+        conn = sqlite3.connect(self.db_path, isolation_level=None, cached_statements=STATEMENT_CACHE_SIZE)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        
+        while True:
+            # Block for the first item, then give a burst a moment to fill the batch;
+            # None is the close sentinel
+            items = [self._write_queue.get()]
+            while items[-1] is not None and len(items) < WRITE_BATCH_SIZE:
+                try:
+                    items.append(self._write_queue.get(timeout=WRITE_BATCH_WAIT))
+                except queue.Empty:
+                    break
+            
+            batch = [item for item in items if item is not None]
+            try:
+                if batch:
+                    self._write_batch(conn, batch)
+            except Exception as e:
+                # Retry one message at a time so a single bad row doesn't cost the whole batch
+                logger.warning("Failed to write memory batch, retrying per message: %s", e)
+                for rows in batch:
+                    try:
+                        self._write_batch(conn, [rows])
+                    except Exception as e:
+                        logger.error("Dropped memory for message at %s: %s", rows[0][0], e)
+            finally:
+                for _ in items:
+                    self._write_queue.task_done()
+            
+            if items[-1] is None:
+                conn.close()
+                return
+    
+    def _write_batch(self, conn: sqlite3.Connection, batch: List[tuple]):
+        """Insert a batch of conversation, experience and knowledge rows"""
+        conversations = [conversation for conversation, _, _ in batch]
+        experiences = [experience for _, experience, _ in batch if experience]
+        knowledge = [row for _, _, row in batch if row]
+        
+        cursor = conn.cursor()
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            cursor.executemany(_SQL_INSERT_CONVERSATION, conversations)
+            cursor.executemany(_SQL_INSERT_EXPERIENCE, experiences)
+            cursor.executemany(_SQL_INSERT_KNOWLEDGE, knowledge)
+            
+            cursor.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                cursor.execute("ROLLBACK")
+            raise
+    
+    def flush(self, timeout: float = FLUSH_TIMEOUT) -> bool:
+        """Wait for queued writes to be committed; False if the writer stopped or the wait timed out"""
+        deadline = time.monotonic() + timeout
+        pending = self._write_queue.all_tasks_done
+        with pending:
+            while self._write_queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or not self._writer.is_alive():
+                    logger.warning("Memory writer did not finish; continuing without queued writes")
+                    return False
+                pending.wait(min(remaining, 0.5))
+        return True
     
     def _extract_keywords(self, text: str) -> List[str]:
         """Extract keywords from text"""
-        common_words = {"the", "a", "an", "and", "or", "but", "in", "on", "at", "to", "for", "of", "with", "is", "are", "was", "were", "be", "been", "being", "have", "has", "had", "do", "does", "did", "will", "would", "could", "should", "may", "might", "must", "shall", "can", "need"}
-        
-        words = text.lower().split()
+        # One regex scan skips punctuation; stop at the first 10 unique keywords
+        seen = set()
         keywords = []
-        
-        for word in words:
-            # Clean punctuation
-            word = word.strip(".,!?;:\"'")
-            if len(word) > 3 and word not in common_words:
-                keywords.append(word)
-        
-        return list(set(keywords))[:10]  # Return top 10 unique keywords
+        for word in _TOKEN_RE.findall(text.lower()):
+            if word in _COMMON_WORDS or word in seen:
+                continue
+            seen.add(word)
+            keywords.append(word)
+            if len(keywords) == MAX_KEYWORDS:
+                break
+        return keywords
     
-    def _extract_experience(self, message: Dict):
-        """Extract experiences from messages"""
-        content = message.get("content", "").lower()
+    def _extract_experience(self, message: Dict, content: str, keywords: str) -> Optional[tuple]:
+        """Extract an experience row from a message, or None if it isn't significant"""
         sender = message.get("sender", "")
         
         # Look for experience indicators
-        experience_indicators = [
-            "i learned", "i discovered", "i found out", "i realized",
-            "turns out", "apparently", "interestingly", "surprisingly"
-        ]
-        
-        importance = 0.5
-        for indicator in experience_indicators:
-            if indicator in content:
-                importance = 0.8
-                break
+        importance = 0.8 if _EXPERIENCE_RE.search(content) else 0.5
         
         # Store significant messages as experiences
         if importance > 0.6 or len(content) > 100:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                INSERT INTO experiences (timestamp, source, content, importance, keywords)
-                VALUES (?, ?, ?, ?, ?)
-            """, (
+            return (
                 datetime.now().isoformat(),
                 sender,
                 message.get("content", ""),
                 importance,
-                json.dumps(self._extract_keywords(content))
-            ))
-            
-            conn.commit()
-            conn.close()
+                keywords
+            )
+        
+        return None
     
-    def _extract_knowledge(self, message: Dict):
-        """Extract factual knowledge from messages"""
+    def _extract_knowledge(self, message: Dict, content_lower: str, keywords: str) -> Optional[tuple]:
+        """Extract a knowledge row from a message, or None if it states no fact"""
         content = message.get("content", "")
         sender = message.get("sender", "")
         
         # Look for factual patterns
-        fact_patterns = [
-            " is ", " are ", " means ", " refers to ", " defined as ",
-            " works by ", " consists of ", " includes ", " requires "
-        ]
-        
-        for pattern in fact_patterns:
-            if pattern in content:
-                # Generate unique ID for fact
-                fact_id = hashlib.md5(content.encode()).hexdigest()[:12]
-                
-                # Determine category
-                category = self._categorize_knowledge(content)
-                
-                conn = sqlite3.connect(self.db_path)
-                cursor = conn.cursor()
-                
-                # Check if fact already exists
-                cursor.execute("SELECT id FROM knowledge WHERE id = ?", (fact_id,))
-                if not cursor.fetchone():
-                    cursor.execute("""
-                        INSERT INTO knowledge (id, timestamp, source, fact, confidence, keywords, category)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """, (
-                        fact_id,
-                        datetime.now().isoformat(),
-                        sender,
-                        content,
-                        0.7,  # Default confidence
-                        json.dumps(self._extract_keywords(content)),
-                        category
-                    ))
-                
-                conn.commit()
-                conn.close()
-                break
+        if not _FACT_RE.search(content):
+            return None
+        
+        # Generate unique ID for fact
+        fact_id = hashlib.blake2b(content.encode("utf-8"), digest_size=6).hexdigest()
+        
+        # Determine category
+        category = self._categorize_knowledge(content_lower)
+        
+        return (
+            fact_id,
+            datetime.now().isoformat(),
+            sender,
+            content,
+            0.7,  # Default confidence
+            keywords,
+            category
+        )
     
-    def _categorize_knowledge(self, content: str) -> str:
-        """Categorize knowledge based on content"""
-        content_lower = content.lower()
-        
-        categories = {
-            "technical": ["code", "programming", "software", "algorithm", "api", "function", "class", "method"],
-            "ai": ["ai", "artificial intelligence", "machine learning", "neural", "model", "training"],
-            "general": ["fact", "information", "data", "statistic"],
-            "personal": ["i am", "my", "me", "james", "claude"],
-            "process": ["how to", "steps", "process", "procedure", "method"]
-        }
-        
-        for category, keywords in categories.items():
-            if any(keyword in content_lower for keyword in keywords):
+    def _categorize_knowledge(self, content_lower: str) -> str:
+        """Categorize knowledge based on lowercased content"""
+        for category, pattern in _CATEGORY_PATTERNS:
+            if pattern.search(content_lower):
                 return category
         
         return "general"
     
     def search_memory(self, query: str, memory_type: str = "all", limit: int = 10) -> List[Dict]:
         """Search through memories"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         results = []
         query_keywords = self._extract_keywords(query)
         
-        if memory_type in ["all", "conversations"]:
-            cursor.execute("""
-                SELECT timestamp, sender, content FROM conversations
-                WHERE content LIKE ? OR keywords LIKE ?
-                ORDER BY timestamp DESC
-                LIMIT ?
-            """, (f"%{query}%", f"%{query}%", limit))
+        # FTS5 query requiring every word of the search; empty falls back to LIKE scans
+        match = ""
+        if self._fts_enabled:
+            match = " ".join(f'"{word}"' for word in _SEARCH_WORD_RE.findall(query))
+        
+        self.flush()  # Include writes still in the queue
+        with self._lock:
+            cursor = self._conn.cursor()
             
-            for row in cursor.fetchall():
-                results.append({
-                    "type": "conversation",
-                    "timestamp": row[0],
-                    "sender": row[1],
-                    "content": row[2]
-                })
-        
-        if memory_type in ["all", "experiences"]:
-            cursor.execute("""
-                SELECT timestamp, source, content, importance FROM experiences
-                WHERE content LIKE ? OR keywords LIKE ?
-                ORDER BY importance DESC, timestamp DESC
-                LIMIT ?
-            """, (f"%{query}%", f"%{query}%", limit))
+            if memory_type in ["all", "conversations"]:
+                if match:
+                    cursor.execute(_SQL_SEARCH_CONVERSATIONS_FTS, (match, limit))
+                else:
+                    cursor.execute(_SQL_SEARCH_CONVERSATIONS_LIKE, (f"%{query}%", f"%{query}%", limit))
+                
+                for row in cursor.fetchall():
+                    results.append({
+                        "type": "conversation",
+                        "timestamp": row[0],
+                        "sender": row[1],
+                        "content": row[2]
+                    })
             
-            for row in cursor.fetchall():
-                results.append({
-                    "type": "experience",
-                    "timestamp": row[0],
-                    "source": row[1],
-                    "content": row[2],
-                    "importance": row[3]
-                })
-        
-        if memory_type in ["all", "knowledge"]:
-            cursor.execute("""
-                SELECT timestamp, source, fact, confidence, category FROM knowledge
-                WHERE fact LIKE ? OR keywords LIKE ? OR category = ?
-                ORDER BY confidence DESC
-                LIMIT ?
-            """, (f"%{query}%", f"%{query}%", query, limit))
+            if memory_type in ["all", "experiences"]:
+                if match:
+                    cursor.execute(_SQL_SEARCH_EXPERIENCES_FTS, (match, limit))
+                else:
+                    cursor.execute(_SQL_SEARCH_EXPERIENCES_LIKE, (f"%{query}%", f"%{query}%", limit))
+                
+                for row in cursor.fetchall():
+                    results.append({
+                        "type": "experience",
+                        "timestamp": row[0],
+                        "source": row[1],
+                        "content": row[2],
+                        "importance": row[3]
+                    })
             
-            for row in cursor.fetchall():
-                results.append({
-                    "type": "knowledge",
-                    "timestamp": row[0],
-                    "source": row[1],
-                    "fact": row[2],
-                    "confidence": row[3],
-                    "category": row[4]
-                })
-        
-        conn.close()
+            if memory_type in ["all", "knowledge"]:
+                if match:
+                    cursor.execute(_SQL_SEARCH_KNOWLEDGE_FTS, (match, query, limit))
+                else:
+                    cursor.execute(_SQL_SEARCH_KNOWLEDGE_LIKE, (f"%{query}%", f"%{query}%", query, limit))
+                
+                for row in cursor.fetchall():
+                    results.append({
+                        "type": "knowledge",
+                        "timestamp": row[0],
+                        "source": row[1],
+                        "fact": row[2],
+                        "confidence": row[3],
+                        "category": row[4]
+                    })
+        
         return results[:limit]
     
     def get_memory_stats(self) -> Dict:
         """Get statistics about stored memories"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         stats = {}
         
-        cursor.execute("SELECT COUNT(*) FROM conversations")
-        stats["total_conversations"] = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM experiences")
-        stats["total_experiences"] = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(*) FROM knowledge")
-        stats["total_knowledge"] = cursor.fetchone()[0]
-        
-        cursor.execute("SELECT COUNT(DISTINCT sender) FROM conversations")
-        stats["unique_participants"] = cursor.fetchone()[0]
+        self.flush()
+        with self._lock:
+            cursor = self._conn.cursor()
+            
+            cursor.execute("SELECT COUNT(*) FROM conversations")
+            stats["total_conversations"] = cursor.fetchone()[0]
+            
+            cursor.execute("SELECT COUNT(*) FROM experiences")
+            stats["total_experiences"] = cursor.fetchone()[0]
+            
+            cursor.execute("SELECT COUNT(*) FROM knowledge")
+            stats["total_knowledge"] = cursor.fetchone()[0]
+            
+            cursor.execute("SELECT COUNT(DISTINCT sender) FROM conversations")
+            stats["unique_participants"] = cursor.fetchone()[0]
         
         # Get database size
         stats["database_size_mb"] = os.path.getsize(self.db_path) / (1024 * 1024)
         
-        conn.close()
         return stats
     
     def cleanup_old_memories(self, days_to_keep: int = 30):
         """Clean up old memories to save space"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
         cutoff_date = datetime.now().isoformat()[:10]  # Keep for simplicity
         
-        # Delete old conversations (keep important ones)
-        cursor.execute("""
-            DELETE FROM conversations
-            WHERE timestamp < date('now', '-' || ? || ' days')
-            AND sender NOT IN ('James', 'Claude', 'James (Clone)')
-        """, (days_to_keep,))
-        
-        # Delete low-importance experiences
-        cursor.execute("""
-            DELETE FROM experiences
-            WHERE timestamp < date('now', '-' || ? || ' days')
-            AND importance < 0.5
-        """, (days_to_keep,))
-        
-        conn.commit()
-        conn.close()
+        self.flush()
+        with self._lock:
+            cursor = self._conn.cursor()
+            
+            # Delete old conversations (keep important ones)
+            cursor.execute("""
+                DELETE FROM conversations
+                WHERE timestamp < date('now', '-' || ? || ' days')
+                AND sender NOT IN ('James', 'Claude', 'James (Clone)')
+            """, (days_to_keep,))
+            
+            # Delete low-importance experiences
+            cursor.execute("""
+                DELETE FROM experiences
+                WHERE timestamp < date('now', '-' || ? || ' days')
+                AND importance < 0.5
+            """, (days_to_keep,))
+    
+    def close(self):
+        """Commit queued writes, stop the writer and close the database connection"""
+        if self._closed:
+            return
+        self._closed = True
+        
+        if self._writer.is_alive():
+            try:
+                self._write_queue.put(None, timeout=FLUSH_TIMEOUT)
+            except queue.Full:
+                logger.warning("Memory write queue is full; closing without waiting for the writer")
+            self._writer.join(FLUSH_TIMEOUT)
+        with self._lock:
+            self._conn.close()
     
     def export_memories(self, export_path: str, format: str = "json"):
-        """Export all memories to file"""
-        memories = {
-            "exported_at": datetime.now().isoformat(),
-            "conversations": self.search_memory("", "conversations", limit=10000),
-            "experiences": self.search_memory("", "experiences", limit=10000),
-            "knowledge": self.search_memory("", "knowledge", limit=10000),
-            "stats": self.get_memory_stats()
-        }
-        
+        """Export all memories to file, streaming rows straight from the database"""
         if format == "json":
-            with open(export_path, 'w') as f:
-                json.dump(memories, f, indent=2)
\ No newline at end of file
+            self.flush()
+            
+            # A separate reader connection, so a long export doesn't hold up writes
+            conn = sqlite3.connect(self.db_path)
+            try:
+                with open(export_path, 'wb', buffering=serialization.WRITE_BUFFER_SIZE) as f:
+                    f.write(b'{"exported_at":' + serialization.dumps(datetime.now().isoformat()))
+                    
+                    for key, memory_type, columns, query in _EXPORT_QUERIES:
+                        f.write(b',"' + key.encode("utf-8") + b'":[')
+                        for i, row in enumerate(conn.execute(query)):
+                            if i:
+                                f.write(b",")
+                            f.write(serialization.dumps({"type": memory_type, **dict(zip(columns, row))}))
+                        f.write(b"]")
+                    
+                    f.write(b',"stats":' + serialization.dumps(self.get_memory_stats()) + b"}")
+            finally:
+                conn.close()
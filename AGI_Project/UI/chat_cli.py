@@ -2,22 +2,18 @@
 CLI Interface for AGI Chat System
 """
 
-import os
 import sys
-import time
-import threading
 from typing import Optional, Dict
 from datetime import datetime
 
-# For better terminal handling on Windows
+import serialization
+from Chat.message_handler import format_time
+
+# Enable ANSI escape processing on Windows consoles
 if sys.platform == "win32":
-    import msvcrt
     import ctypes
     kernel32 = ctypes.windll.kernel32
     kernel32.SetConsoleMode(kernel32.GetStdHandle(-11), 7)
-else:
-    import termios
-    import tty
 
 
 class ChatCLI:
@@ -33,12 +29,29 @@ class ChatCLI:
             "error": "\033[91m",       # Red
             "reset": "\033[0m"
         }
+        
+        # Colored sender prefixes and timestamp brackets, built once
+        reset = self.colors["reset"]
+        self._sender_prefix = {
+            name: f"{color}{name}:{reset} "
+            for name, color in self.colors.items() if name not in ("system", "error", "reset")
+        }
+        self._ts_open = f"{self.colors['system']}["
+        self._ts_close = f"]{reset} "
+        
+        # Indented response prefixes; other responders are added on first use
+        self._response_prefix = {
+            name: f"  {self.colors[name]} {name}:{reset} " for name in ("Claude", "James (Clone)")
+        }
+        
         self.show_timestamps = True
         self.notification_sound = False
     
     def clear_screen(self):
         """Clear the terminal screen"""
-        os.system('cls' if os.name == 'nt' else 'clear')
+        # ANSI clear and cursor home; Windows consoles have VT processing enabled above
+        sys.stdout.write("\x1b[2J\x1b[H")
+        sys.stdout.flush()
     
     def print_header(self):
         """Print application header"""
@@ -53,39 +66,49 @@ class ChatCLI:
     
     def print_message(self, message: Dict):
         """Print a formatted message"""
+        print(self._render_message(message))
+    
+    def _render_message(self, message: Dict) -> str:
+        """Render a message and its responses as one string"""
         sender = message.get("sender", "Unknown")
         content = message.get("content", "")
         timestamp = message.get("timestamp", "")
         
         # Format timestamp
+        prefix = ""
         if self.show_timestamps and timestamp:
-            dt = datetime.fromisoformat(timestamp)
-            time_str = dt.strftime("%H:%M:%S")
-            print(f"{self.colors['system']}[{time_str}]{self.colors['reset']}", end=" ")
+            prefix = self._ts_open + format_time(timestamp) + self._ts_close
         
-        # Print sender and message
-        color = self.colors.get(sender, self.colors["reset"])
-        print(f"{color}{sender}:{self.colors['reset']} {content}")
+        # Sender and message
+        sender_prefix = self._sender_prefix.get(sender)
+        if sender_prefix is None:
+            reset = self.colors["reset"]
+            sender_prefix = f"{reset}{sender}:{reset} "
+        lines = [prefix + sender_prefix + content]
         
-        # Print responses if any
+        # Responses if any
         if message.get("responses"):
             for responder, response in message["responses"].items():
-                self._print_response(responder, response["content"])
+                lines.append(self._render_response(responder, response["content"]))
+        
+        return "\n".join(lines)
     
-    def _print_response(self, responder: str, content: str):
-        """Print an AI response"""
-        color = self.colors.get(responder, self.colors["reset"])
-        # Indent responses
-        print(f"  {color} {responder}:{self.colors['reset']} {content}")
+    def _render_response(self, responder: str, content: str) -> str:
+        """Render an AI response line"""
+        prefix = self._response_prefix.get(responder)
+        if prefix is None:
+            reset = self.colors["reset"]
+            color = self.colors.get(responder, reset)
+            # Indent responses
+            prefix = self._response_prefix[responder] = f"  {color} {responder}:{reset} "
+        return prefix + content
     
     def print_system_message(self, message: str, msg_type: str = "info"):
         """Print system message"""
-        if msg_type == "error":
-            color = self.colors["error"]
-        else:
-            color = self.colors["system"]
+        colors = self.colors
+        color = colors["error"] if msg_type == "error" else colors["system"]
         
-        print(f"\n{color}[System] {message}{self.colors['reset']}\n")
+        print(f"\n{color}[System] {message}{colors['reset']}\n")
     
     def handle_command_result(self, result: Dict):
         """Handle command execution results"""
@@ -109,9 +132,9 @@ class ChatCLI:
         elif cmd_type == "export":
             try:
                 filename = f"chat_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{result['format']}"
-                content = self.chat_manager.export_conversation(result["format"])
-                with open(filename, 'w', encoding='utf-8') as f:
-                    f.write(content)
+                chunks = self.chat_manager.export_conversation_iter(result["format"])
+                with open(filename, 'w', encoding='utf-8', buffering=serialization.WRITE_BUFFER_SIZE) as f:
+                    f.writelines(chunks)
                 self.print_system_message(f"Conversation exported to {filename}")
             except Exception as e:
                 self.print_system_message(f"Export failed: {e}", "error")
@@ -200,8 +223,8 @@ class ChatCLI:
         history = self.chat_manager.get_conversation_history(limit=10)
         if history:
             self.print_system_message(f"Showing last {len(history)} messages from previous session:")
-            for msg in history:
-                self.print_message(msg)
+            # Write the whole replay at once rather than a print per line
+            sys.stdout.write("\n".join(self._render_message(msg) for msg in history) + "\n")
             print("\n" + "-" * 60 + "\n")
         
         self.print_system_message("Chat ready! Type your message or /help for commands.")
@@ -263,6 +286,9 @@ class ChatCLI:
 
 
 # Utility functions for better CLI experience
+_WRAPPERS = {}  # (width, indent) -> textwrap.TextWrapper, built on first use
+
+
 class CLIEnhancements:
     """Additional CLI enhancements for better UX"""
     
@@ -271,20 +297,22 @@ class CLIEnhancements:
         """Format long messages with proper line wrapping"""
         import textwrap
         
-        lines = message.split('\n')
+        # One wrapper per layout, reused across lines and calls; it applies the indent itself
+        wrapper = _WRAPPERS.get((width, indent))
+        if wrapper is None:
+            indent_str = " " * indent
+            wrapper = _WRAPPERS[(width, indent)] = textwrap.TextWrapper(
+                width=width, initial_indent=indent_str, subsequent_indent=indent_str
+            )
+        
+        indent_str = wrapper.initial_indent
         formatted_lines = []
         
-        for line in lines:
+        for line in message.split('\n'):
             if len(line) > width:
-                wrapped = textwrap.wrap(line, width=width-indent)
-                formatted_lines.extend(wrapped)
+                formatted_lines.extend(wrapper.wrap(line))
             else:
-                formatted_lines.append(line)
-        
-        # Apply indent
-        if indent > 0:
-            indent_str = " " * indent
-            formatted_lines = [indent_str + line for line in formatted_lines]
+                formatted_lines.append(indent_str + line)
         
         return '\n'.join(formatted_lines)
     
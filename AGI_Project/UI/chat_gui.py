@@ -6,7 +6,38 @@ import tkinter as tk
 from tkinter import ttk, scrolledtext
 import threading
 import queue
-from datetime import datetime
+import time
+
+WINDOW_SIZE = 500  # Lines kept in the chat widget; the full transcript stays in the chat session
+
+# Keys allowed through to the read-only chat display
+NAVIGATION_KEYS = frozenset({"Left", "Right", "Up", "Down", "Home", "End", "Prior", "Next"})
+SHIFT_MASK = 0x1
+CONTROL_MASK = 0x4
+
+# Chat display tags and their styles
+TAGS = (
+    ("user", {"foreground": "#4CAF50"}),
+    ("claude", {"foreground": "#2196F3"}),
+    ("james", {"foreground": "#FF9800"}),
+    ("system", {"foreground": "#9E9E9E", "font": ("Consolas", 9, "italic")}),
+    ("timestamp", {"foreground": "#666666", "font": ("Consolas", 8)}),
+)
+
+# Display tag for each lowercased sender; anyone else is shown as system
+SENDER_TAGS = {
+    "you": "user",
+    "claude": "claude",
+    "james": "james"
+}
+
+HELP_TEXT = """Available commands:
+/help - Show this help message
+/clear - Clear the chat display
+/save - Save the current conversation
+/exit or /quit - Exit the chat
+/model <name> - Switch AI model (claude or james)
+/history - Show conversation history"""
 
 
 class ChatGUI:
@@ -15,6 +46,21 @@ class ChatGUI:
         self.message_queue = queue.Queue()
         self.running = True
         
+        # Last formatted timestamp and the second it was formatted for
+        self._ts_sec = None
+        self._ts_str = ""
+        
+        # Slash commands, dispatched on their first word
+        self._commands = {
+            "/help": self._cmd_help,
+            "/clear": self._cmd_clear,
+            "/save": self._cmd_save,
+            "/exit": self._cmd_exit,
+            "/quit": self._cmd_exit,
+            "/model": self._cmd_model,
+            "/history": self._cmd_history
+        }
+        
         # Create main window
         self.root = tk.Tk()
         self.root.title("AGI Chat")
@@ -29,6 +75,11 @@ class ChatGUI:
         self.process_thread = threading.Thread(target=self.process_messages, daemon=True)
         self.process_thread.start()
         
+        # One worker handles user messages in the order they were sent
+        self._work_q = queue.Queue()
+        self._worker = threading.Thread(target=self.process_user_messages, daemon=True)
+        self._worker.start()
+        
     def setup_ui(self):
         """Setup the user interface"""
         # Main container
@@ -76,16 +127,18 @@ class ChatGUI:
             bg="#1e1e1e",
             fg="#ffffff",
             insertbackground="#ffffff",
-            state="disabled"
+            insertwidth=0
         )
         self.chat_display.grid(row=0, column=0, sticky=(tk.W, tk.E, tk.N, tk.S))
         
+        # Read-only by binding rather than state="disabled", so inserts need no state toggling
+        self.chat_display.bind("<Key>", self._block_edit)
+        for event in ("<<Paste>>", "<<PasteSelection>>", "<<Cut>>", "<<Clear>>"):
+            self.chat_display.bind(event, lambda e: "break")
+        
         # Configure tags for different speakers
-        self.chat_display.tag_configure("user", foreground="#4CAF50")
-        self.chat_display.tag_configure("claude", foreground="#2196F3")
-        self.chat_display.tag_configure("james", foreground="#FF9800")
-        self.chat_display.tag_configure("system", foreground="#9E9E9E", font=("Consolas", 9, "italic"))
-        self.chat_display.tag_configure("timestamp", foreground="#666666", font=("Consolas", 8))
+        for name, options in TAGS:
+            self.chat_display.tag_configure(name, **options)
         
         # Input area
         input_frame = ttk.LabelFrame(main_frame, text="Your Message", padding="10")
@@ -151,10 +204,9 @@ class ChatGUI:
         self.display_message("System", "Type your message and press Enter to send. Type /help for available commands.")
         
     def on_enter_key(self, event):
-        """Handle Enter key press"""
-        if not event.state & 0x1:  # Check if Shift is not pressed
-            self.send_message()
-            return "break"  # Prevent default behavior
+        """Handle Enter key press; Shift-Return has its own binding, so no modifier check is needed"""
+        self.send_message()
+        return "break"  # Prevent default behavior
         
     def send_message(self):
         """Send the user's message"""
@@ -173,53 +225,50 @@ class ChatGUI:
             self.handle_command(message)
             return
             
-        # Send to chat manager in separate thread
-        threading.Thread(
-            target=self.process_user_message,
-            args=(message,),
-            daemon=True
-        ).start()
+        # Send to chat manager on the worker thread
+        self._work_q.put(message)
         
     def handle_command(self, command):
         """Handle special commands"""
         cmd = command.lower().strip()
+        name, _, args = cmd.partition(" ")
         
-        if cmd == "/help":
-            help_text = """Available commands:
-/help - Show this help message
-/clear - Clear the chat display
-/save - Save the current conversation
-/exit or /quit - Exit the chat
-/model <name> - Switch AI model (claude or james)
-/history - Show conversation history"""
-            self.display_message("System", help_text)
-            
-        elif cmd == "/clear":
-            self.clear_chat()
-            
-        elif cmd == "/save":
-            self.chat_manager.save_session()
-            self.display_message("System", "Conversation saved.")
-            
-        elif cmd in ["/exit", "/quit"]:
-            self.exit_chat()
-            
-        elif cmd.startswith("/model "):
-            model = cmd.split(" ", 1)[1]
-            self.display_message("System", f"Model switching not implemented yet. Current models: Claude and James")
-            
-        elif cmd == "/history":
-            history = self.chat_manager.get_conversation_history()
-            if history:
-                self.display_message("System", "=== Conversation History ===")
-                for msg in history[-10:]:  # Show last 10 messages
-                    self.display_message(msg['role'], msg['content'], show_timestamp=False)
-            else:
-                self.display_message("System", "No conversation history.")
-                
+        handler = self._commands.get(name)
+        if handler:
+            handler(args)
         else:
             self.display_message("System", f"Unknown command: {command}")
             
+    def _cmd_help(self, args):
+        """Show the available commands"""
+        self.display_message("System", HELP_TEXT)
+        
+    def _cmd_clear(self, args):
+        """Clear the chat display"""
+        self.clear_chat()
+        
+    def _cmd_save(self, args):
+        """Save the current conversation"""
+        self.chat_manager.save_session()
+        self.display_message("System", "Conversation saved.")
+        
+    def _cmd_exit(self, args):
+        """Exit the chat"""
+        self.exit_chat()
+        
+    def _cmd_model(self, args):
+        """Switch AI model"""
+        self.display_message("System", f"Model switching not implemented yet. Current models: Claude and James")
+        
+    def _cmd_history(self, args):
+        """Show the last 10 messages of the conversation"""
+        history = self.chat_manager.get_conversation_history()
+        if history:
+            self.display_message("System", "=== Conversation History ===")
+            self.display_messages([(msg['sender'], msg['content']) for msg in history[-10:]])
+        else:
+            self.display_message("System", "No conversation history.")
+            
     def process_user_message(self, message):
         """Process user message and get AI responses"""
         try:
@@ -241,57 +290,101 @@ class ChatGUI:
             
     def display_message(self, sender, message, show_timestamp=True):
         """Display a message in the chat window"""
-        self.chat_display.config(state="normal")
+        # Text and tag pairs for a single insert
+        segments = []
         
         # Add timestamp if requested
         if show_timestamp:
-            timestamp = datetime.now().strftime("%H:%M:%S")
-            self.chat_display.insert(tk.END, f"[{timestamp}] ", "timestamp")
-            
-        # Determine tag based on sender
-        tag = "system"
-        if sender.lower() == "you":
-            tag = "user"
-        elif sender.lower() == "claude":
-            tag = "claude"
-        elif sender.lower() == "james":
-            tag = "james"
-            
+            # Reformat only when the second changes
+            now = time.time()
+            sec = int(now)
+            if sec != self._ts_sec:
+                self._ts_sec = sec
+                self._ts_str = time.strftime("%H:%M:%S", time.localtime(now))
+            segments += [f"[{self._ts_str}] ", "timestamp"]
+        
+        segments += [f"{sender}: ", self._sender_tag(sender), f"{message}\n\n", ""]
+        
         # Insert message
-        self.chat_display.insert(tk.END, f"{sender}: ", tag)
-        self.chat_display.insert(tk.END, f"{message}\n\n")
+        self.chat_display.insert(tk.END, *segments)
+        
+        # Keep the widget to its window, then auto-scroll to bottom
+        self._trim_display()
+        self.chat_display.see(tk.END)
         
-        # Auto-scroll to bottom
+    def display_messages(self, messages):
+        """Display several (sender, message) pairs with a single insert"""
+        # Text and tag pairs for every message, inserted in one call
+        segments = []
+        for sender, message in messages:
+            segments += [f"{sender}: ", self._sender_tag(sender), f"{message}\n\n", ""]
+        
+        self.chat_display.insert(tk.END, *segments)
+        
+        self._trim_display()
         self.chat_display.see(tk.END)
-        self.chat_display.config(state="disabled")
+        
+    def _block_edit(self, event):
+        """Swallow keys that would edit the chat display; navigation and copy still work"""
+        if event.keysym in NAVIGATION_KEYS:
+            return None
+        if event.keysym in ("Tab", "ISO_Left_Tab"):
+            # Move focus on as a disabled Text would, instead of inserting a tab
+            widget = event.widget.tk_focusPrev() if event.keysym == "ISO_Left_Tab" or event.state & SHIFT_MASK else event.widget.tk_focusNext()
+            if widget:
+                widget.focus_set()
+            return "break"
+        if event.state & CONTROL_MASK and event.keysym.lower() in ("c", "a", "slash"):
+            return None
+        return "break"
+        
+    def _sender_tag(self, sender):
+        """Determine the display tag for a sender"""
+        return SENDER_TAGS.get(sender.lower(), "system")
+        
+    def _trim_display(self):
+        """Delete the oldest lines from the widget, in one call, once it exceeds WINDOW_SIZE"""
+        overflow = int(self.chat_display.index("end-1c").split(".")[0]) - WINDOW_SIZE
+        if overflow > 0:
+            self.chat_display.delete("1.0", f"{overflow + 1}.0")
         
     def clear_chat(self):
         """Clear the chat display"""
-        self.chat_display.config(state="normal")
         self.chat_display.delete("1.0", tk.END)
-        self.chat_display.config(state="disabled")
         self.display_message("System", "Chat cleared.")
         
     def update_status(self, status, color="green"):
         """Update status label"""
         self.status_label.config(text=status, foreground=color)
         
+    def process_user_messages(self):
+        """Hand queued user messages to the chat manager one at a time"""
+        while True:
+            # None is the shutdown sentinel
+            message = self._work_q.get()
+            if message is None:
+                break
+            self.process_user_message(message)
+            
     def process_messages(self):
         """Process messages from queue (for thread-safe updates)"""
         while self.running:
+            # Block until a message arrives; None is the shutdown sentinel
+            item = self.message_queue.get()
+            if item is None:
+                break
+            
+            # Hand the display to the Tk event loop
             try:
-                # Check for messages in queue
-                try:
-                    sender, message = self.message_queue.get(timeout=0.1)
-                    self.display_message(sender, message)
-                except queue.Empty:
-                    pass
+                self.root.after(0, self.display_message, *item)
             except Exception as e:
                 print(f"Message processing error: {e}")
                 
     def exit_chat(self):
         """Exit the chat application"""
         self.running = False
+        self.message_queue.put(None)
+        self._work_q.put(None)
         self.chat_manager.save_session()
         self.root.quit()
         
@@ -5,11 +5,13 @@ with open('UI/chat_cli.py', 'rb') as f:
 null_count = data.count(b'\x00')
 print(f'Found {null_count} null bytes in CLI')
 
-# Remove null bytes
-clean_data = data.replace(b'\x00', b'')
-
-# Write cleaned data
-with open('UI/chat_cli.py', 'wb') as f:
-    f.write(clean_data)
-
-print('CLI file cleaned!')
\ No newline at end of file
+# Nothing to do for a clean file; leave it (and its mtime) untouched
+if null_count:
+    # Remove null bytes
+    clean_data = data.translate(None, b'\x00')
+    
+    # Write cleaned data
+    with open('UI/chat_cli.py', 'wb') as f:
+        f.write(clean_data)
+    
+    print('CLI file cleaned!')
\ No newline at end of file
@@ -1,85 +1,37 @@
 import sys
-import os
+import importlib
+import traceback
 
 print("Python version:", sys.version)
 print("Default encoding:", sys.getdefaultencoding())
 
-try:
-    print("Importing json...")
-    import json
-    print("Success!")
-except Exception as e:
-    print(f"Failed: {e}")
-
-try:
-    print("Importing os...")
-    import os
-    print("Success!")
-except Exception as e:
-    print(f"Failed: {e}")
-
-try:
-    print("Importing datetime...")
-    from datetime import datetime
-    print("Success!")
-except Exception as e:
-    print(f"Failed: {e}")
-
-try:
-    print("Importing typing...")
-    from typing import Dict, List, Optional
-    print("Success!")
-except Exception as e:
-    print(f"Failed: {e}")
-
-try:
-    print("Importing threading...")
-    import threading
-    print("Success!")
-except Exception as e:
-    print(f"Failed: {e}")
-
-try:
-    print("Importing queue...")
-    import queue
-    print("Success!")
-except Exception as e:
-    print(f"Failed: {e}")
-
-print("\nNow testing local imports...")
-
-try:
-    print("Importing ClaudeAI...")
-    from AIs.Claude.claude_ai import ClaudeAI
-    print("Success!")
-except Exception as e:
-    print(f"Failed: {e}")
-    import traceback
-    traceback.print_exc()
-
-try:
-    print("Importing JamesCloneAI...")
-    from AIs.JamesClone.james_ai import JamesCloneAI
-    print("Success!")
-except Exception as e:
-    print(f"Failed: {e}")
-    import traceback
-    traceback.print_exc()
-
-try:
-    print("Importing MemorySystem...")
-    from Chat.memory_system import MemorySystem
-    print("Success!")
-except Exception as e:
-    print(f"Failed: {e}")
-    import traceback
-    traceback.print_exc()
-
-try:
-    print("Importing MessageHandler...")
-    from Chat.message_handler import MessageHandler
-    print("Success!")
-except Exception as e:
-    print(f"Failed: {e}")
-    import traceback
-    traceback.print_exc()
\ No newline at end of file
+# (label, module) pairs, standard library first; local failures get a traceback
+STDLIB_MODULES = [
+    ("json", "json"),
+    ("os", "os"),
+    ("datetime", "datetime"),
+    ("typing", "typing"),
+    ("threading", "threading"),
+    ("queue", "queue"),
+]
+LOCAL_MODULES = [
+    ("ClaudeAI", "AIs.Claude.claude_ai"),
+    ("JamesCloneAI", "AIs.JamesClone.james_ai"),
+    ("MemorySystem", "Chat.memory_system"),
+    ("MessageHandler", "Chat.message_handler"),
+]
+
+# Print as we go, so a hanging or crashing import shows how far it got
+for modules, show_traceback in ((STDLIB_MODULES, False), (LOCAL_MODULES, True)):
+    if show_traceback:
+        print("\nNow testing local imports...", flush=True)
+
+    for label, module in modules:
+        print(f"Importing {label}...", flush=True)
+        try:
+            importlib.import_module(module)
+            print("Success!", flush=True)
+        except Exception as e:
+            print(f"Failed: {e}", flush=True)
+            if show_traceback:
+                print(traceback.format_exc().rstrip(), flush=True)
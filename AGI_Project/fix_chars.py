@@ -5,9 +5,11 @@ with open('Chat/chat_manager.py', 'rb') as f:
 bad_char = bytes([0x13])  # \x13
 good_char = b'*'  # Simple asterisk
 
-clean_data = data.replace(bad_char, good_char)
-
-with open('Chat/chat_manager.py', 'wb') as f:
-    f.write(clean_data)
-
-print('Fixed special characters')
\ No newline at end of file
+# Only rewrite the file when there is something to fix
+if bad_char in data:
+    clean_data = data.translate(bytes.maketrans(bad_char, good_char))
+    
+    with open('Chat/chat_manager.py', 'wb') as f:
+        f.write(clean_data)
+    
+    print('Fixed special characters')
\ No newline at end of file
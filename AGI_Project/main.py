@@ -6,13 +6,15 @@ A multi-agent chat system featuring you, Claude, and a Qwen-based clone of you
 
 import sys
 import os
-import json
+import logging
 import argparse
+from functools import lru_cache
 from pathlib import Path
 
 # Add project root to path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+import serialization
 from Chat.chat_manager import ChatManager
 from UI.chat_cli import ChatCLI
 from UI.chat_gui import ChatGUI
@@ -22,8 +24,13 @@ from UI.web_chat import WebChat
 def load_config():
     """Load configuration from config.json"""
     config_path = Path(__file__).parent / "config.json"
-    with open(config_path, 'r') as f:
-        return json.load(f)
+    return _parse_config(str(config_path), config_path.stat().st_mtime_ns)
+
+
+@lru_cache(maxsize=4)
+def _parse_config(path: str, mtime_ns: int):
+    """Parse a config file; cached until the file's modification time changes"""
+    return serialization.load(path)
 
 
 def main():
@@ -42,6 +49,9 @@ def main():
     
     args = parser.parse_args()
     
+    # Modules log through the standard logging tree; ChatManager turns on debug records
+    logging.basicConfig(format="%(message)s")
+    
     # Load configuration
     config = load_config()
     
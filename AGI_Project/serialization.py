@@ -0,0 +1,47 @@
+"""
+Serialization helpers - JSON encoding/decoding backed by orjson when available
+"""
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; fall back to the stdlib encoder
+    orjson = None
+
+# Buffer size for record-at-a-time writers, so batches reach the OS in few syscalls
+WRITE_BUFFER_SIZE = 256 * 1024
+
+
+def dumps(obj: Any, indent: bool = False) -> bytes:
+    """Serialize an object to UTF-8 encoded JSON"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None, ensure_ascii=False).encode("utf-8")
+
+
+def dumps_line(obj: Any) -> bytes:
+    """Serialize an object as a single JSONL record, trailing newline included"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def loads(data) -> Any:
+    """Parse JSON from bytes or str"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dump(obj: Any, filepath: str, indent: bool = True):
+    """Write an object to a JSON file"""
+    with open(filepath, 'wb') as f:
+        f.write(dumps(obj, indent=indent))
+
+
+def load(filepath: str) -> Any:
+    """Read a JSON file"""
+    with open(filepath, 'rb') as f:
+        return loads(f.read())
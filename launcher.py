@@ -7,27 +7,28 @@ Directly launches the AGI chat GUI interface
 import sys
 import os
 from pathlib import Path
-import subprocess
 
 
 def launch_gui():
     """Launch the GUI chat interface directly"""
     try:
         # Get the path to the AGI_Project directory
-        launcher_dir = Path(__file__).parent
+        launcher_dir = Path(__file__).resolve().parent
         project_dir = launcher_dir / "AGI_Project"
         
         # Change to project directory
         os.chdir(project_dir)
         
-        # Launch the main.py with GUI option
-        cmd = [sys.executable, "main.py", "--ui", "gui"]
+        # Run main.py with the GUI option in this process rather than a second interpreter
+        sys.path.insert(0, str(project_dir))
+        sys.argv = [str(project_dir / "main.py"), "--ui", "gui"]
+        from main import main
         
-        # Run the command
-        result = subprocess.run(cmd, capture_output=False)
-        
-        if result.returncode != 0:
-            raise Exception(f"Process exited with code {result.returncode}")
+        try:
+            main()
+        except SystemExit as e:
+            if e.code:
+                raise Exception(f"AGI Chat exited with code {e.code}")
             
     except Exception as e:
         import tkinter as tk